@@ -0,0 +1,97 @@
+import argparse
+import configparser
+import json
+import random
+from pathlib import Path
+
+real_coins = [
+    {'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin'},
+    {'id': 'ethereum', 'symbol': 'eth', 'name': 'Ethereum'}
+]
+
+gwei_per_eth = 1000000000
+
+
+def coins_list(size):
+    return real_coins + [
+        {'id': f'synth-coin-{i}', 'symbol': f'sy{i}', 'name': f'Synth Coin {i}'} for i in range(size - len(real_coins))
+    ]
+
+
+def markets(coins, rng):
+    return [
+        {
+            'id': c['id'], 'symbol': c['symbol'], 'name': c['name'], 'market_cap_rank': rank,
+            'current_price': round(rng.uniform(0.0001, 60000), 6), 'market_cap': rng.randint(10 ** 6, 10 ** 12)
+        }
+        for rank, c in enumerate(coins, start=1)
+    ]
+
+
+def beaconchain(validator_indexes, rng):
+    return {
+        'status': 'OK',
+        'data': [
+            {
+                'validatorindex': int(i), 'pubkey': f'0x{int(i):096x}',
+                'balance': 32 * gwei_per_eth + rng.randint(-gwei_per_eth // 10, 3 * gwei_per_eth)
+            }
+            for i in validator_indexes
+        ]
+    }
+
+
+def holdings_ini(coins, n_holdings, validator_indexes, rng):
+    cfg = configparser.RawConfigParser()
+    cfg['ethereum'] = {'held': f'{rng.uniform(0, 100):.5f}', 'validators': ','.join(validator_indexes)}
+    cfg['other coins'] = {}
+
+    # a mix of ids, symbols and names, all unique so get_holdings never has to ask which coin was meant
+    for pos, c in enumerate(coins[len(real_coins):len(real_coins) + n_holdings - 1]):
+        key = (c['id'], c['symbol'], c['name'])[pos % 3]
+        cfg['other coins'][key] = f'{rng.uniform(0, 10000):.5f}'
+
+    return cfg
+
+
+def write_fixtures(path, n_holdings, n_validators, coins_list_size=15000, seed=1):
+    path = Path(path)
+    rng = random.Random(seed)
+
+    coins = coins_list(max(coins_list_size, n_holdings + len(real_coins)))
+    validator_indexes = [str(i) for i in range(n_validators)]
+
+    with (path / 'coins_list.json').open('w') as f:
+        json.dump(coins, f)
+
+    held = coins[:n_holdings + 1]
+    with (path / 'price_data.json').open('w') as f:
+        json.dump(
+            {
+                'currency': 'usd', 'ids': sorted(c['id'] for c in held), 'data': markets(held, rng),
+                'cache_headers': {}
+            },
+            f
+        )
+
+    with (path / 'validators_data.json').open('w') as f:
+        json.dump(beaconchain(validator_indexes, rng), f)
+
+    with (path / 'holdings.ini').open('w') as f:
+        holdings_ini(coins, n_holdings, validator_indexes, rng).write(f)
+
+    for stale in ('coins_list.db', 'history.db'):
+        if (path / stale).is_file():
+            (path / stale).unlink()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='write a synthetic portfolio into a folder')
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--holdings', type=int, default=10, help='number of coins held (10 to 5,000)')
+    parser.add_argument('--validators', type=int, default=10, help='number of validators (10 to 500,000)')
+    parser.add_argument('--coins-list-size', type=int, default=15000)
+    parser.add_argument('--seed', type=int, default=1)
+
+    args = parser.parse_args()
+    write_fixtures(args.path, args.holdings, args.validators, args.coins_list_size, args.seed)
@@ -0,0 +1,236 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from generate import coins_list, markets, beaconchain
+
+# how much 1 USD is worth in each supported fiat currency
+fiat_rates = {'usd': 1.0, 'eur': 0.92, 'gbp': 0.79, 'jpy': 150.0, 'aud': 1.52, 'cad': 1.36, 'chf': 0.88}
+crypto_rates = {'btc': 'bitcoin', 'eth': 'ethereum'}
+
+beaconchain_max_validators = 100
+
+
+@dataclass
+class Faults:
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_limit: float = 0.0
+    retry_after: float = 1.0
+    timeout: float = 0.0
+    hang: float = 15.0
+    malformed: float = 0.0
+    seed: int = 1
+    counts: Counter = field(default_factory=Counter)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        # one draw per request, in the order they arrive, so a run with the same seed fails the same way
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            roll = self._rng.random()
+
+            fault = None
+            for name, chance in (('timeout', self.timeout), ('429', self.rate_limit), ('malformed', self.malformed)):
+                if roll < chance:
+                    fault = name
+                    break
+
+                roll -= chance
+
+            self.counts[fault or 'ok'] += 1
+
+        return fault, delay
+
+
+@dataclass
+class MockApis:
+    coins_list_size: int = 15000
+    seed: int = 1
+
+    def __post_init__(self):
+        self.coins = coins_list(self.coins_list_size)
+        self.markets = {m['id']: m for m in markets(self.coins, random.Random(self.seed))}
+
+    def _rate(self, vs_currency):
+        if vs_currency in crypto_rates:
+            return 1 / self.markets[crypto_rates[vs_currency]]['current_price']
+
+        return fiat_rates.get(vs_currency)
+
+    def _markets(self, params):
+        rate = self._rate(params.get('vs_currency', '').lower())
+        if rate is None:
+            return 400, {'error': 'invalid vs_currency'}
+
+        ids = [i for i in params.get('ids', '').split(',') if i in self.markets]
+        per_page = int(params.get('per_page', 100))
+        page = int(params.get('page', 1))
+
+        found = sorted((self.markets[i] for i in ids), key=lambda m: m['market_cap_rank'])
+        return 200, [
+            dict(m, current_price=m['current_price'] * rate, market_cap=m['market_cap'] * rate)
+            for m in found[(page - 1) * per_page:page * per_page]
+        ]
+
+    def _simple_price(self, params):
+        vs_currencies = [c.lower() for c in params.get('vs_currencies', '').split(',') if c]
+        if not vs_currencies or any(self._rate(c) is None for c in vs_currencies):
+            return 400, {'error': 'invalid vs_currencies'}
+
+        include_market_cap = params.get('include_market_cap') == 'true'
+        prices = {}
+        for coin_id in (i for i in params.get('ids', '').split(',') if i in self.markets):
+            m = self.markets[coin_id]
+            prices[coin_id] = {}
+
+            for c in vs_currencies:
+                prices[coin_id][c] = m['current_price'] * self._rate(c)
+                if include_market_cap:
+                    prices[coin_id][f'{c}_market_cap'] = m['market_cap'] * self._rate(c)
+
+        return 200, prices
+
+    def _validators(self, indexes):
+        if not indexes or len(indexes) > beaconchain_max_validators or not all(i.isdigit() for i in indexes):
+            return 400, {'status': 'ERROR: invalid validator index', 'data': None}
+
+        # balances are seeded per validator so they don't depend on how the indexes were batched
+        data = [beaconchain([i], random.Random(f'{self.seed}:{i}'))['data'][0] for i in indexes]
+        return 200, {'status': 'OK', 'data': data if len(data) > 1 else data[0]}
+
+    def route(self, path, params):
+        if path == '/api/v3/coins/list':
+            return 200, self.coins
+
+        if path == '/api/v3/simple/supported_vs_currencies':
+            return 200, list(fiat_rates) + list(crypto_rates)
+
+        if path == '/api/v3/coins/markets':
+            return self._markets(params)
+
+        if path == '/api/v3/simple/price':
+            return self._simple_price(params)
+
+        if path.startswith('/api/v1/validator/'):
+            return self._validators(path[len('/api/v1/validator/'):].split(','))
+
+        return 404, {'error': 'not found'}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fault, delay = self.server.faults.draw()
+        time.sleep(delay)
+
+        try:
+            if fault == 'timeout':
+                # hold the request until the client gives up, then drop the connection
+                time.sleep(self.server.faults.hang)
+                self.close_connection = True
+                return
+
+            if fault == '429':
+                self._send(
+                    429, b'{"status": {"error_code": 429, "error_message": "rate limit exceeded"}}',
+                    headers={'Content-Type': 'application/json', 'Retry-After': f'{self.server.faults.retry_after:g}'}
+                )
+                return
+
+            url = urlsplit(self.path)
+            status, data = self.server.apis.route(url.path, {k: v[-1] for k, v in parse_qs(url.query).items()})
+            body = json.dumps(data).encode()
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+
+            if fault == 'malformed':
+                self._send(status, body[:len(body) // 2], headers={'Content-Type': 'application/json'})
+
+            elif status == 200 and self.headers.get('If-None-Match') == etag:
+                self._send(304, headers={'ETag': etag})
+
+            else:
+                self._send(status, body, headers={'Content-Type': 'application/json', 'ETag': etag})
+
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+def serve(host, port, apis, faults, verbose=False):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.apis = apis
+    server.faults = faults
+    server.verbose = verbose
+
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='serve synthetic CoinGecko and beaconcha.in responses locally, with optional latency and faults'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--coins-list-size', type=int, default=15000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many more seconds, picked at random')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='fraction of requests answered with a 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with each 429')
+    parser.add_argument('--timeout', type=float, default=0.0, help='fraction of requests that never get an answer')
+    parser.add_argument('--hang', type=float, default=15.0, help='how long timed out requests are held (seconds)')
+    parser.add_argument('--malformed', type=float, default=0.0, help='fraction of responses cut off halfway')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    server = serve(
+        args.host, args.port, MockApis(coins_list_size=args.coins_list_size, seed=args.seed),
+        Faults(
+            latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit, retry_after=args.retry_after,
+            timeout=args.timeout, hang=args.hang, malformed=args.malformed, seed=args.seed
+        ),
+        verbose=args.verbose
+    )
+
+    base_url = f'http://{args.host}:{server.server_port}'
+    print(
+        f' serving on {base_url}, to use it set these in config.ini:\n\n'
+        f'   coingecko url = {base_url}/api/v3/\n'
+        f'   beaconcha.in url = {base_url}/api/v1/\n',
+        flush=True
+    )
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()
+        print(f'\n responses: {", ".join(f"{k} {v}" for k, v in sorted(server.faults.counts.items()))}')
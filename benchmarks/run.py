@@ -0,0 +1,248 @@
+import argparse
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+try:
+    import resource
+
+except ImportError:
+    resource = None
+
+from generate import write_fixtures
+
+repo_path = Path(__file__).resolve().parent.parent
+baseline_file = Path(__file__).resolve().parent / 'baseline.json'
+
+# stages this quick are mostly timer noise, so they are never reported as regressions
+min_regression_seconds = 0.005
+
+# modules a --test run should never import, because nothing it does goes online
+offline_forbidden_modules = ('requests', 'urllib3')
+
+
+def _measure(func, setup=None, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    args = setup() if setup else ()
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return min(timings), peak
+
+
+def run_scenario(workdir, n_holdings, n_validators, coins_list_size, repeat):
+    import c_index
+    import c_api
+    import c_functions
+    from c_constants import load_config
+
+    compare_to = load_config().compare_to
+    write_fixtures(workdir, n_holdings, n_validators, coins_list_size)
+    holdings_ini = (workdir / 'holdings.ini').read_text()
+    validator_indexes = [str(i) for i in range(n_validators)]
+
+    def fresh_holdings():
+        (workdir / 'holdings.ini').write_text(holdings_ini)
+        return ()
+
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        results = {}
+
+        start = time.perf_counter()
+        c_index.get_coin_index()
+        results['coin index build'] = (time.perf_counter() - start, None)
+
+        results['get_holdings'] = _measure(
+            lambda: c_functions.get_holdings(comparison_coins=compare_to), setup=fresh_holdings, repeat=repeat
+        )
+
+        fresh_holdings()
+        coins = c_functions.get_holdings(comparison_coins=compare_to)
+        results['get_coin_prices'] = _measure(
+            lambda c: c_api.get_coin_prices(coins=c, currency='USD', test=True),
+            setup=lambda: (copy.deepcopy(coins),), repeat=repeat
+        )
+
+        results['get_beaconchain_data'] = _measure(
+            lambda: c_api.get_beaconchain_data(validator_indexes=validator_indexes, test=True), repeat=repeat
+        )
+
+        coins_json = c_api.get_coin_prices(coins=coins, currency='USD', test=True)
+        coins_json['holdings']['ethereum']['validators_data'] = c_api.get_beaconchain_data(
+            validator_indexes=validator_indexes, test=True
+        )
+        results['build_snapshot'] = _measure(
+            lambda: c_functions.build_snapshot(coins_json=coins_json, fiat_currency='USD'), repeat=repeat
+        )
+
+        snapshot = c_functions.build_snapshot(coins_json=coins_json, fiat_currency='USD')
+        results['display_data'] = _measure(lambda: c_functions.display_data(snapshot=snapshot), repeat=repeat)
+
+        snapshot = c_functions.build_snapshot(coins_json=coins_json, fiat_currency='USD', validator_mode=True)
+        validators = next(c.validators for c in snapshot.coins if c.validators)
+        results['display_validators'] = _measure(
+            lambda: c_functions.display_validators(snapshot=snapshot, validators=validators), repeat=repeat
+        )
+
+    return results
+
+
+def _import_times(args, cwd):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args], cwd=str(cwd),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True
+    )
+
+    # lines look like "import time:       312 |      24885 |   package.module", indented two spaces per level
+    imported = {}
+    for line in result.stderr.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if line.startswith('import time:') and len(fields) == 3 and fields[1].strip().isdigit():
+            name = fields[2][1:]
+            imported[name.strip()] = (int(fields[1]) / 1000000, not name.startswith(' '))
+
+    return imported
+
+
+def measure_startup(workdir, repeat):
+    # only count what the app imports, not what the interpreter (site, .pth files, ...) loads on its own
+    interpreter = _import_times(['-c', 'pass'], workdir)
+
+    import_seconds = []
+    run_seconds = []
+    for _ in range(repeat):
+        imported = _import_times(['pyfolio2.py', '-t'], workdir)
+        import_seconds.append(sum(
+            seconds for name, (seconds, top_level) in imported.items() if top_level and name not in interpreter
+        ))
+
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, 'pyfolio2.py', '-t'], cwd=str(workdir),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        run_seconds.append(time.perf_counter() - start)
+
+    forbidden = sorted(name for name in imported if name.split('.')[0] in offline_forbidden_modules)
+
+    return {'startup imports': (min(import_seconds), None), 'startup run': (min(run_seconds), None)}, forbidden
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1048576 if sys.platform == 'darwin' else 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='time each stage of a run against synthetic data, offline')
+    parser.add_argument('--holdings', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--validators', type=int, nargs='+', default=[10, 1000, 100000, 500000])
+    parser.add_argument('--coins-list-size', type=int, default=15000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', action='store_true', help=f'save the results as the baseline ("{baseline_file}")')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2, help='flag stages this much slower than the baseline (default 0.2)'
+    )
+    parser.add_argument(
+        '--import-budget', type=float, default=0.15,
+        help='flag a --test run whose own imports take longer than this many seconds (default 0.15)'
+    )
+    args = parser.parse_args()
+
+    # every data file lives next to the modules, so they are run from a scratch copy to keep the real ones untouched
+    workdir = Path(tempfile.mkdtemp(prefix='pyfolio2-bench-'))
+    for module in [*repo_path.glob('c_*.py'), repo_path / 'pyfolio2.py']:
+        shutil.copy(module, workdir)
+
+    sys.path.insert(0, str(workdir))
+    with redirect_stdout(sys.stderr):
+        # the first load writes the default config.ini into the scratch folder
+        from c_constants import load_config
+        load_config()
+
+    scenarios = [(h, min(args.validators)) for h in args.holdings]
+    scenarios += [(min(args.holdings), v) for v in args.validators if (min(args.holdings), v) not in scenarios]
+
+    baseline = json.loads(baseline_file.read_text()) if baseline_file.is_file() else {}
+    results = {}
+    regressions = []
+
+    def report(scenario, key, stage, seconds, peak):
+        results[key] = {'seconds': seconds, 'peak': peak}
+
+        base = baseline.get(key)
+        change = ''
+        if base and base['seconds']:
+            ratio = seconds / base['seconds'] - 1
+            change = f'{ratio:+.0%}'
+
+            if ratio > args.tolerance and seconds - base['seconds'] > min_regression_seconds:
+                regressions.append(f'{key} more than {args.tolerance:.0%} slower than the baseline')
+                change += ' !'
+
+        peak_str = f'{peak / 1048576:,.1f}' if peak is not None else ''
+        print(f' {scenario:<32} {stage:<22} {seconds:>10.4f} {peak_str:>10} {change:>10}', flush=True)
+
+    try:
+        print(f'\n {"scenario":<32} {"stage":<22} {"seconds":>10} {"peak MB":>10} {"baseline":>10}')
+
+        write_fixtures(workdir, min(args.holdings), min(args.validators), args.coins_list_size)
+        startup, forbidden = measure_startup(workdir, args.repeat)
+
+        for stage, (seconds, peak) in startup.items():
+            report('--test run', f'startup/{stage}', stage, seconds, peak)
+
+        if startup['startup imports'][0] > args.import_budget:
+            regressions.append(f'startup imports over the {args.import_budget:,.3f}s budget')
+
+        if forbidden:
+            regressions.append(f'a --test run imported {", ".join(forbidden)}')
+
+        for n_holdings, n_validators in scenarios:
+            scenario = f'{n_holdings} holdings, {n_validators} validators'
+
+            for stage, (seconds, peak) in run_scenario(
+                workdir, n_holdings, n_validators, args.coins_list_size, args.repeat
+            ).items():
+                report(scenario, f'{n_holdings}h/{n_validators}v/{stage}', stage, seconds, peak)
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    max_rss = _max_rss_mb()
+    if max_rss is not None:
+        print(f'\n max rss {max_rss:,.1f} MB')
+
+    if args.save:
+        baseline_file.write_text(json.dumps(results, indent=2))
+        print(f' baseline saved ("{baseline_file}")')
+
+    if regressions:
+        print(f'\n {len(regressions)} regression(s):')
+        for regression in regressions:
+            print(f'  {regression}')
+
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,59 +1,171 @@
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import json
+import os
 import time
+import sys
 
+from c_http import get_with_json, get_json
+from c_history import record_history
+from c_profile import span, in_current_span
 from c_constants import (
-    coins_list_json_file, coins_json_file, coingecko_headers,
-    coingecko_currencies_url, coingecko_coins_url, coingecko_markets_url, request_timeout
+    load_config, this_path, coins_list_json_file, currencies_json_file, coins_json_file, validators_json_file,
+    fiat_prices_json_file,
+    coingecko_headers, beaconchain_batch_size, beaconchain_max_workers,
+    coingecko_markets_per_page, coingecko_max_workers, coingecko_min_request_interval, coingecko_request_burst,
+    currencies_list_ttl, coingecko_metadata_ttl
 )
 
 
+class _RateLimiter:
+    # a token bucket: a burst of requests goes out straight away, then one per min_interval as tokens refill
+    def __init__(self, min_interval, burst):
+        self.min_interval = min_interval
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.min_interval)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens * self.min_interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+coingecko_rate_limiter = _RateLimiter(min_interval=coingecko_min_request_interval, burst=coingecko_request_burst)
+
+
+def _do_conditional_request(url, params=None, cache_headers=None):
+    coingecko_rate_limiter.wait()
+
+    headers = dict(coingecko_headers)
+    if cache_headers and cache_headers.get('etag'):
+        headers['If-None-Match'] = cache_headers['etag']
+
+    if cache_headers and cache_headers.get('last_modified'):
+        headers['If-Modified-Since'] = cache_headers['last_modified']
+
+    response, response_json = get_with_json(url=url, params=params, headers=headers)
+
+    if response is not None and response.status_code == 304:
+        return None, cache_headers, True
+
+    if response_json is None:
+        print(f' bad response from {url}\n')
+        return None, cache_headers, False
+
+    new_cache_headers = {
+        'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')
+    }
+
+    return response_json, new_cache_headers, False
+
+
 def _do_request(url, params=None):
+    return _do_conditional_request(url=url, params=params)[0]
+
+
+def _read_json(json_file):
+    # a missing, unreadable or half written file is the same as having no saved data
     try:
-        response = requests.get(
-            url=url, headers=coingecko_headers, params=params if params else {}, timeout=request_timeout
-        )
+        with json_file.open() as f, span('json load', file=json_file.name):
+            return json.load(f)
 
-    except requests.exceptions.ReadTimeout:
-        print(f' timeout: {url}\n')
-        exit()
+    except (OSError, json.JSONDecodeError):
+        return None
 
-    else:
-        try:
-            response_json = response.json()
 
-        except Exception as e:
-        # except json.decoder.JSONDecodeError:
-            # print(response.content, e.msg)
-            print(f' bad response from {url}\n')
+def _write_json(json_file, data):
+    # the background refresh and overlapping runs write the same files, so each one is swapped in whole
+    tmp_file = json_file.with_name(f'{json_file.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    try:
+        with tmp_file.open('w') as f:
+            json.dump(data, f)
+
+        tmp_file.replace(json_file)
+
+    finally:
+        if tmp_file.is_file():
+            tmp_file.unlink()
+
+
+def get_supported_currencies(debug=False, update=False):
+    if debug:
+        start = time.perf_counter()
+
+    currencies = None
+    currencies_file_str = f'{time.strftime("%H:%M:%S")} currencies file ("{currencies_json_file}")'
+
+    if currencies_json_file.is_file():
+        age = time.time() - currencies_json_file.stat().st_mtime
+
+        if update or age >= currencies_list_ttl:
+            if debug:
+                print(f' {currencies_file_str} found but downloading fresh copy... ', end='', flush=True)
+
+        else:
+            if debug:
+                print(f' {currencies_file_str} found, loading... ', end='', flush=True)
+
+            currencies = _read_json(currencies_json_file)
+
+            if not isinstance(currencies, list):
+                currencies = None
+                if debug:
+                    print('unreadable, downloading... ', end='', flush=True)
+
+    elif debug:
+        print(f' {currencies_file_str} not found, downloading... ', end='', flush=True)
+
+    if currencies is None:
+        currencies = _do_request(load_config().coingecko_currencies_url)
+
+        if isinstance(currencies, list):
+            _write_json(currencies_json_file, currencies)
 
         else:
-            return response_json
+            currencies = _read_json(currencies_json_file)
+            currencies = currencies if isinstance(currencies, list) else None
+
+    if debug:
+        print(f'done ({time.perf_counter() - start:,.3f}s)')
 
-    return None
+    return currencies
 
 
-def is_valid_currency(currency):
+def is_valid_currency(currency, debug=False, update=False):
     if currency.lower() == 'usd':
         return True
 
-    currencies = requests.get(coingecko_currencies_url, headers=coingecko_headers).json()
+    currencies = get_supported_currencies(debug=debug, update=update)
 
-    return True if currency.lower() in currencies else False
+    # if the list can't be fetched, let the markets request decide
+    return True if currencies is None or currency.lower() in currencies else False
 
 
-def get_coins_list(debug=False, update=False):
+def get_coins_list(debug=False, update=False, cache_headers=None):
     if debug:
         start = time.perf_counter()
 
     download_list = False
+    coins_list = None
 
     coins_file_str = f'{time.strftime("%H:%M:%S")} coins file ("{coins_list_json_file}")'
 
     if coins_list_json_file.is_file():
         if update:
             if debug:
-                print(f' {coins_file_str} found but downloading fresh copy... ', end='', flush=True)
+                print(
+                    f' {coins_file_str} found but checking for a fresh copy'
+                    f'{" (conditional)" if cache_headers else ""}... ', end='', flush=True
+                )
 
             download_list = True
 
@@ -61,28 +173,220 @@ def get_coins_list(debug=False, update=False):
             if debug:
                 print(f' {coins_file_str} found, loading... ', end='', flush=True)
 
-            with coins_list_json_file.open() as f:
-                coins_list = json.load(f)
+            coins_list = _read_json(coins_list_json_file)
+
+            if not isinstance(coins_list, list):
+                if debug:
+                    print('unreadable, downloading... ', end='', flush=True)
+
+                coins_list = None
+                download_list = True
+                cache_headers = None
 
     else:
         if debug:
             print(f' {coins_file_str} not found, downloading... ', end='', flush=True)
 
         download_list = True
+        cache_headers = None
 
     if download_list:
-        coins_list = requests.get(coingecko_coins_url, headers=coingecko_headers, timeout=request_timeout).json()
+        coins_list, cache_headers, not_modified = _do_conditional_request(
+            load_config().coingecko_coins_url, cache_headers=cache_headers
+        )
+
+        if not_modified:
+            coins_list_json_file.touch()
 
-        with coins_list_json_file.open('w') as f:
-            json.dump(coins_list, f)
+            if debug:
+                print('not modified, ', end='', flush=True)
+
+        elif isinstance(coins_list, list):
+            _write_json(coins_list_json_file, coins_list)
+
+        else:
+            coins_list = _read_json(coins_list_json_file)
+
+            if not isinstance(coins_list, list):
+                print(f' {time.strftime("%H:%M:%S")} bad http response and no saved coins list found... exiting.')
+                exit()
+
+            print(f' {time.strftime("%H:%M:%S")} no coins list returned, loading "{coins_list_json_file}"... ')
 
     if debug:
         print(f'done ({time.perf_counter() - start:,.3f}s)')
 
-    return coins_list
+    return coins_list, cache_headers
+
+
+def _load_price_cache():
+    cache = _read_json(coins_json_file)
+
+    if isinstance(cache, list):
+        cache = {'currency': None, 'ids': [c['id'] for c in cache], 'data': cache}
+
+    if not isinstance(cache, dict) or not {'currency', 'ids', 'data'} <= cache.keys():
+        return None
+
+    try:
+        mtime = coins_json_file.stat().st_mtime
+
+    except OSError:
+        return None
+
+    cache['age'] = time.time() - mtime
+    cache.setdefault('metadata_time', mtime)
+
+    return cache
+
+
+def _save_price_cache(price_data, coin_ids, currency, cache_headers=None, metadata_time=None):
+    _write_json(
+        coins_json_file,
+        {
+            'currency': currency.lower(), 'ids': sorted(coin_ids), 'data': price_data,
+            'cache_headers': cache_headers or {}, 'metadata_time': metadata_time or time.time()
+        }
+    )
+
+
+def _fetch_pages(coin_ids, get_page):
+    pages = [
+        coin_ids[i:i + coingecko_markets_per_page] for i in range(0, len(coin_ids), coingecko_markets_per_page)
+    ]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(coingecko_max_workers, len(pages)))) as executor:
+        return pages, list(executor.map(in_current_span(get_page), pages))
+
+
+def _get_markets(coin_ids, currency, cache=None):
+    if cache is None or cache['currency'] != currency.lower():
+        cache = {'data': [], 'cache_headers': {}}
+
+    def get_page(page_ids):
+        page_key = ','.join(page_ids)
+        params = {'ids': page_key, 'vs_currency': currency, 'per_page': coingecko_markets_per_page, 'page': 1}
+
+        page_data, page_cache_headers, not_modified = _do_conditional_request(
+            url=load_config().coingecko_markets_url, params=params,
+            cache_headers=cache.get('cache_headers', {}).get(page_key)
+        )
+
+        if not_modified:
+            page_data = [coin_data for coin_data in cache['data'] if coin_data['id'] in page_ids]
+
+        return page_key, page_data, page_cache_headers, not_modified
+
+    pages, results = _fetch_pages(coin_ids, get_page)
+
+    price_data = [coin_data for r in results if isinstance(r[1], list) for coin_data in r[1]]
+    failed_ids = [
+        coin_id for page_ids, r in zip(pages, results) if not isinstance(r[1], list) for coin_id in page_ids
+    ]
+    cache_headers = {r[0]: r[2] for r in results if isinstance(r[1], list) and r[2]}
+    not_modified = all(r[3] for r in results)
+
+    return price_data if len(failed_ids) < len(coin_ids) else None, failed_ids, cache_headers, not_modified
+
+
+def _get_simple_price_page(page_ids, vs_currencies, include_market_cap=False):
+    params = {'ids': ','.join(page_ids), 'vs_currencies': ','.join(vs_currencies)}
+    if include_market_cap:
+        params['include_market_cap'] = 'true'
+
+    return _do_request(load_config().coingecko_prices_url, params=params)
+
+
+def _get_simple_prices(coin_ids, currency, cache, extra_currencies=()):
+    # simple/price only sends back the numbers, so the rank, name and symbol are kept from the last coins/markets call
+    saved = {coin_data['id']: coin_data for coin_data in cache['data']}
+    vs_currency = currency.lower()
+    extra_vs_currencies = [c.lower() for c in extra_currencies]
+
+    # the extra currencies ride along in the same request as the main one
+    pages, results = _fetch_pages(
+        coin_ids,
+        lambda page_ids: _get_simple_price_page(page_ids, [vs_currency] + extra_vs_currencies, include_market_cap=True)
+    )
+
+    price_data = [
+        dict(
+            saved[coin_id], current_price=prices[vs_currency],
+            market_cap=prices.get(f'{vs_currency}_market_cap', saved[coin_id]['market_cap'])
+        )
+        for r in results if isinstance(r, dict) for coin_id, prices in r.items()
+        if coin_id in saved and prices.get(vs_currency) is not None
+    ]
+    failed_ids = [coin_id for page_ids, r in zip(pages, results) if not isinstance(r, dict) for coin_id in page_ids]
+
+    fiat_prices = {
+        coin_id: {c: prices[c] for c in extra_vs_currencies if c in prices}
+        for r in results if isinstance(r, dict) for coin_id, prices in r.items()
+    } if extra_vs_currencies and not failed_ids else None
+
+    return price_data if len(failed_ids) < len(coin_ids) else None, failed_ids, fiat_prices
+
+
+def _use_simple_prices(coin_ids, cache):
+    return (
+        not load_config().show_market_caps and cache is not None and set(coin_ids) <= set(cache['ids'])
+        and time.time() - cache['metadata_time'] < coingecko_metadata_ttl
+    )
+
+
+def _get_prices(coin_ids, currency, cache=None, extra_currencies=()):
+    if _use_simple_prices(coin_ids, cache):
+        price_data, failed_ids, fiat_prices = _get_simple_prices(coin_ids, currency, cache, extra_currencies)
+
+        # the etags belong to the coins/markets pages, which this data no longer matches
+        return price_data, failed_ids, {}, False, cache['metadata_time'], fiat_prices
+
+    return _get_markets(coin_ids, currency, cache=cache) + (None, None)
+
+
+def refresh_price_cache(coin_ids, currency):
+    cache = _load_price_cache()
+    price_data, failed_ids, cache_headers, not_modified, metadata_time, _ = _get_prices(
+        coin_ids, currency, cache=cache
+    )
+
+    if not_modified:
+        coins_json_file.touch()
+
+    elif price_data:
+        _save_price_cache(
+            price_data, [c for c in coin_ids if c not in failed_ids], currency, cache_headers, metadata_time
+        )
+        record_history(price_data=price_data, currency=currency)
+
+    return price_data
+
+
+def _refresh_price_cache_in_background(coin_ids, currency):
+    import subprocess
+    import tempfile
+
+    # the ids go through a file, a long holdings list would overflow the windows command line (~32k characters)
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write('\n'.join(coin_ids))
+
+    kwargs = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+
+    else:
+        kwargs['start_new_session'] = True
+
+    try:
+        subprocess.Popen([sys.executable, __file__, currency, f.name], cwd=str(this_path), **kwargs)
+
+    except OSError as e:
+        print(f' {time.strftime("%H:%M:%S")} could not start the background price refresh ({e})')
+        os.remove(f.name)
 
 
-def get_coin_prices(coins, currency, debug=False, test=False):
+def get_coin_prices(coins, currency, debug=False, test=False, record_holdings=True, fresh=False, extra_currencies=()):
     def get_coin_dict():
         return {
             'rank': coin_data['market_cap_rank'],
@@ -95,31 +399,72 @@ def get_coin_prices(coins, currency, debug=False, test=False):
     if debug:
         start = time.perf_counter()
 
+    config = load_config()
     update_saved_data = False
 
-    if test and coins_json_file.is_file():
+    coin_ids = sorted(set(list(coins['holdings'].keys()) + list(coins['comparison'].keys())))
+
+    # fresh skips the ttl and the background refresh (the saved data is still the fallback when the fetch fails)
+    cache = _load_price_cache()
+    cache_usable = (
+        not fresh and cache is not None and cache['currency'] == currency.lower() and set(coin_ids) <= set(cache['ids'])
+    )
+
+    if test and cache is not None:
         if debug:
             print(
                 f' {time.strftime("%H:%M:%S")} price data file ("{coins_json_file}") found, loading... ',
                 end='', flush=True
             )
 
-        with coins_json_file.open() as f:
-            price_data = json.load(f)
+        price_data = cache['data']
+
+    elif cache_usable and cache['age'] < config.price_cache_ttl:
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} price data file ("{coins_json_file}") is {cache["age"]:,.0f}s old '
+                f'(ttl {config.price_cache_ttl}s), loading... ', end='', flush=True
+            )
+
+        price_data = cache['data']
+
+    elif cache_usable and config.stale_while_revalidate:
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} price data file ("{coins_json_file}") is {cache["age"]:,.0f}s old, '
+                f'loading and refreshing in the background... ', end='', flush=True
+            )
+
+        price_data = cache['data']
+        _refresh_price_cache_in_background(coin_ids, currency)
 
     else:
         if debug:
-            print(f' {time.strftime("%H:%M:%S")} downloading fresh price data... ', end='', flush=True)
+            print(
+                f' {time.strftime("%H:%M:%S")} downloading fresh price data '
+                f'({"simple/price" if _use_simple_prices(coin_ids, cache) else "coins/markets"})... ',
+                end='', flush=True
+            )
 
-        coin_ids = list(set(list(coins['holdings'].keys()) + list(coins['comparison'].keys())))
-        params = {'ids': ','.join(coin_ids), 'vs_currency': currency}
+        price_data, failed_ids, cache_headers, not_modified, metadata_time, fiat_prices = _get_prices(
+            coin_ids, currency, cache=cache, extra_currencies=extra_currencies
+        )
 
-        price_data = _do_request(url=coingecko_markets_url, params=params)
+        # left for add_fiat_prices, so it doesn't ask simple/price for the same coins again
+        if fiat_prices is not None:
+            _save_fiat_prices(coin_ids, extra_currencies, fiat_prices)
+            coins['fiat_prices'] = _fiat_prices_by_currency(coin_ids, extra_currencies, fiat_prices)
+
+        if not_modified:
+            coins_json_file.touch()
+
+            if debug:
+                print('not modified, ', end='', flush=True)
 
-        if price_data:
+        elif price_data:
             update_saved_data = True
 
-        elif coins_json_file.is_file():
+        elif cache is not None:
             print(f' {time.strftime("%H:%M:%S")} no json returned, loading data from "{coins_json_file}"... ')
             if debug:
                 print(
@@ -127,8 +472,7 @@ def get_coin_prices(coins, currency, debug=False, test=False):
                     end='', flush=True
                 )
 
-            with coins_json_file.open() as f:
-                price_data = json.load(f)
+            price_data = cache['data']
 
         else:
             print(f' {time.strftime("%H:%M:%S")} bad http response and no saved data file found... exiting.')
@@ -154,15 +498,209 @@ def get_coin_prices(coins, currency, debug=False, test=False):
     if debug:
         print(f'done ({time.perf_counter() - start:,.3f}s)')
 
+    missing_ids = sorted(set(coin_ids) - {coin_data['id'] for coin_data in price_data})
+    if missing_ids:
+        print(f' {time.strftime("%H:%M:%S")} no market data returned by CoinGecko for: {", ".join(missing_ids)}')
+
     if update_saved_data:
         if debug:
             start = time.perf_counter()
             print(f' {time.strftime("%H:%M:%S")} saving fresh price data ("{coins_json_file}")... ', end='', flush=True)
 
-        with coins_json_file.open('w') as f:
-            json.dump(price_data, f)
+        _save_price_cache(
+            price_data, [c for c in coin_ids if c not in failed_ids], currency, cache_headers, metadata_time
+        )
 
         if debug:
             print(f'done ({time.perf_counter() - start:,.3f}s)')
 
+        record_history(
+            price_data=price_data, currency=currency, holdings=coins['holdings'] if record_holdings else None,
+            debug=debug
+        )
+
     return coins
+
+
+def get_fiat_prices(coin_ids, currencies, debug=False, test=False):
+    # one simple/price request covers every currency, instead of a coins/markets request per currency
+    if debug:
+        start = time.perf_counter()
+
+    vs_currencies = [c.lower() for c in currencies]
+
+    saved = _read_json(fiat_prices_json_file)
+    if not isinstance(saved, dict) or not {'currencies', 'ids', 'data'} <= saved.keys():
+        saved = None
+
+    saved_covers = (
+        saved is not None and set(vs_currencies) <= set(saved['currencies']) and set(coin_ids) <= set(saved['ids'])
+    )
+
+    fiat_prices = None
+
+    if test and saved_covers:
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} fiat prices file ("{fiat_prices_json_file}") found, loading... ',
+                end='', flush=True
+            )
+
+        fiat_prices = saved['data']
+
+    else:
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} downloading prices in {", ".join(currencies)}... ', end='', flush=True
+            )
+
+        results = _fetch_pages(coin_ids, lambda page_ids: _get_simple_price_page(page_ids, vs_currencies))[1]
+
+        if all(isinstance(r, dict) for r in results):
+            fiat_prices = {coin_id: prices for r in results for coin_id, prices in r.items()}
+            _save_fiat_prices(coin_ids, currencies, fiat_prices)
+
+        elif saved is not None:
+            print(f' {time.strftime("%H:%M:%S")} no fiat prices returned, loading "{fiat_prices_json_file}"... ')
+            fiat_prices = saved['data']
+
+    if debug:
+        print(f'done ({time.perf_counter() - start:,.3f}s)')
+
+    return _fiat_prices_by_currency(coin_ids, currencies, fiat_prices or {})
+
+
+def _save_fiat_prices(coin_ids, currencies, fiat_prices):
+    _write_json(
+        fiat_prices_json_file, {'currencies': [c.lower() for c in currencies], 'ids': coin_ids, 'data': fiat_prices}
+    )
+
+
+def _fiat_prices_by_currency(coin_ids, currencies, fiat_prices):
+    for currency in currencies:
+        missing_ids = [c for c in coin_ids if fiat_prices.get(c, {}).get(currency.lower()) is None]
+        if missing_ids:
+            print(f' {time.strftime("%H:%M:%S")} no {currency.upper()} price found for: {", ".join(missing_ids)}')
+
+    return {
+        coin_id: {currency.upper(): price for currency, price in prices.items()}
+        for coin_id, prices in fiat_prices.items()
+    }
+
+
+def _get_beaconchain_batch(validator_indexes):
+    url = f'{load_config().beaconchain_validator_url}{",".join(validator_indexes)}'
+
+    bc_data = get_json(url)
+    data = bc_data.get('data') if isinstance(bc_data, dict) else None
+
+    if data is None:
+        return None
+
+    return data if isinstance(data, list) else [data]
+
+
+def _load_saved_validators():
+    saved = _read_json(validators_json_file)
+    data = saved.get('data') if isinstance(saved, dict) else None
+
+    if data is None:
+        return []
+
+    return data if isinstance(data, list) else [data]
+
+
+def get_beaconchain_data(validator_indexes, debug=False, test=False):
+    start = time.perf_counter()
+    update_saved_data = False
+
+    data = None
+    if test:
+        # the saved file can also hold validators from other holdings files (see --batch)
+        saved_data = {str(v['validatorindex']): v for v in _load_saved_validators()}
+        data = [saved_data[i] for i in validator_indexes if i in saved_data]
+
+    if data:
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} beaconcha.in data file ("{validators_json_file}") found, loading... ',
+                end='', flush=True
+            )
+
+    else:
+        batches = [
+            validator_indexes[i:i + beaconchain_batch_size]
+            for i in range(0, len(validator_indexes), beaconchain_batch_size)
+        ]
+
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} downloading fresh beaconcha.in data '
+                f'({len(validator_indexes)} validators in {len(batches)} batches)... ', end='', flush=True
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, min(beaconchain_max_workers, len(batches)))) as executor:
+            results = list(executor.map(in_current_span(_get_beaconchain_batch), batches))
+
+        data = [v for batch_data in results if batch_data for v in batch_data]
+        fresh = len(data)
+        failed_batches = [batch for batch, batch_data in zip(batches, results) if batch_data is None]
+
+        if failed_batches:
+            saved_data = {str(v['validatorindex']): v for v in _load_saved_validators()}
+
+            missing = []
+            for batch in failed_batches:
+                for validator_index in batch:
+                    if validator_index in saved_data:
+                        data.append(saved_data[validator_index])
+
+                    else:
+                        missing.append(validator_index)
+
+            print(
+                f' Bad response from beaconcha.in for {len(failed_batches)} of {len(batches)} batches, using locally '
+                f'saved validator balances from the last successful call for those validators...'
+            )
+
+            if missing:
+                print(
+                    f' No locally saved balances found for {len(missing)} validator(s): '
+                    f'{", ".join(missing[:10])}{", ..." if len(missing) > 10 else ""}'
+                )
+
+        if not data:
+            print(' No validator balances from beaconcha.in and none saved locally.')
+            exit()
+
+        update_saved_data = len(failed_batches) < len(batches)
+
+    if debug:
+        print(f'done ({(time.perf_counter() - start):.3f}s)')
+
+    if update_saved_data:
+        if debug:
+            start = time.perf_counter()
+            print(f' {time.strftime("%H:%M:%S")} saving fresh beaconcha.in data ("{validators_json_file}")... ',
+                  end='', flush=True)
+
+        # merged by index, so runs over different holdings files don't drop each other's validators
+        saved_data = {str(v['validatorindex']): v for v in _load_saved_validators()}
+        saved_data.update((str(v['validatorindex']), v) for v in data)
+        _write_json(validators_json_file, {'status': 'OK', 'data': list(saved_data.values())})
+
+        if debug:
+            print(f'done ({time.perf_counter() - start:,.3f}s)')
+
+        # balances filled in from the saved file are stale, so only the fresh ones go into the history
+        record_history(bc_data=data[:fresh], debug=debug)
+
+    return data
+
+
+if __name__ == '__main__':
+    with open(sys.argv[2]) as ids_file:
+        ids = ids_file.read().split()
+
+    os.remove(sys.argv[2])
+    refresh_price_cache(coin_ids=ids, currency=sys.argv[1])
@@ -1,62 +1,156 @@
 from pathlib import Path
-import configparser
 from collections import namedtuple
+from dataclasses import dataclass
+from typing import Tuple
+import configparser
+import sys
+import threading
 
 this_path = Path(__file__).parent
 config_file = this_path / 'config.ini'
 holdings_file = this_path / 'holdings.ini'
 
 coins_list_json_file = this_path / 'coins_list.json'
+coins_list_db_file = this_path / 'coins_list.db'
+currencies_json_file = this_path / 'supported_currencies.json'
 coins_json_file = this_path / 'price_data.json'
+fiat_prices_json_file = this_path / 'fiat_prices.json'
 validators_json_file = this_path / 'validators_data.json'
+history_db_file = this_path / 'history.db'
 
-coingecko_base_url = 'https://api.coingecko.com/api/v3/'
-coingecko_currencies_url = coingecko_base_url + 'simple/supported_vs_currencies'
-coingecko_coins_url = coingecko_base_url + 'coins/list'
-coingecko_markets_url = coingecko_base_url + 'coins/markets'
-coingecko_prices_url = coingecko_base_url + 'simple/price'
+default_coingecko_url = 'https://api.coingecko.com/api/v3/'
+default_beaconchain_url = 'https://beaconcha.in/api/v1/'
 coingecko_headers = {'accept': 'application/json'}
 
 request_timeout = 10
+currencies_list_ttl = 7 * 24 * 60 * 60
+# with market caps hidden, prices come from simple/price and ranks and names are only refreshed this often
+coingecko_metadata_ttl = 24 * 60 * 60
+http_retries = 3
+http_backoff = 1.0
+http_max_backoff = 60
+http_pool_size = 8
+coingecko_markets_per_page = 250
+coingecko_max_workers = 4
+coingecko_min_request_interval = 1.0
+coingecko_request_burst = 4
+beaconchain_batch_size = 100
+beaconchain_max_workers = 4
+
+# validator balances only change once per epoch (32 slots of 12s)
+watch_validators_interval = 32 * 12
+
+validators_per_page = 100
+render_chunk_lines = 500
+
+DecimalPlaces = namedtuple('DecimalPlaces', 'fiat fiat_total crypto percent')
+
+
+@dataclass(frozen=True)
+class Config:
+    currency: str = 'usd'
+    split_validators: bool = False
+    show_bitcoin_if_not_held: bool = True
+    show_market_caps: bool = True
+    show_market_cap_percentages: bool = True
+    compare_to_btc: bool = True
+    compare_to_eth: bool = True
+    compare_to: Tuple[str, ...] = ('',)
+    price_cache_ttl: int = 0
+    stale_while_revalidate: bool = False
+    coingecko_url: str = default_coingecko_url
+    beaconchain_url: str = default_beaconchain_url
+    dp: DecimalPlaces = DecimalPlaces(fiat=5, fiat_total=2, crypto=5, percent=3)
+
+    @property
+    def coingecko_currencies_url(self):
+        return self.coingecko_url + 'simple/supported_vs_currencies'
+
+    @property
+    def coingecko_coins_url(self):
+        return self.coingecko_url + 'coins/list'
+
+    @property
+    def coingecko_markets_url(self):
+        return self.coingecko_url + 'coins/markets'
+
+    @property
+    def coingecko_prices_url(self):
+        return self.coingecko_url + 'simple/price'
+
+    @property
+    def beaconchain_validator_url(self):
+        return self.beaconchain_url + 'validator/'
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def load_config():
+    # read config.ini the first time it's needed rather than at import, so quick runs only pay for what they use
+    global _config
+
+    if _config is not None:
+        return _config
+
+    with _config_lock:
+        if _config is not None:
+            return _config
+
+        cfg = configparser.RawConfigParser()
+
+        if not config_file.is_file():
+            cfg['options'] = {
+                'default currency': 'usd',
+                'show individual validators': True,
+                'show bitcoin if not held': True,
+                'show market caps': True,
+                'show market cap percentages': True,
+                'compare to bitcoin': True,
+                'compare to ethereum': True,
+                'compare to': '',
+                'price cache ttl': 0,
+                'stale while revalidate': False,
+                'coingecko url': default_coingecko_url,
+                'beaconcha.in url': default_beaconchain_url
+            }
+
+            cfg['decimal places'] = {'fiat': '5', 'fiat total': '2', 'crypto': '5', 'percent': '3'}
+
+            with config_file.open('w') as f:
+                cfg.write(f)
+
+            print(f'\n Config saved with default values. Open "{config_file}" to make changes.\n', file=sys.stderr)
+
+        cfg.read(config_file)
+        options = cfg['options']
+        decimal_places = cfg['decimal places']
+
+        _config = Config(
+            currency=options.get('default currency', fallback='usd'),
+            split_validators=options.getboolean('show individual validators', fallback=False),
+            show_bitcoin_if_not_held=options.getboolean('show bitcoin if not held', fallback=True),
+            show_market_caps=options.getboolean('show market caps', fallback=True),
+            show_market_cap_percentages=options.getboolean('show market cap percentages', fallback=True),
+            compare_to_btc=options.getboolean('compare to bitcoin', fallback=True),
+            compare_to_eth=options.getboolean('compare to ethereum', fallback=True),
+            compare_to=tuple(x.strip() for x in options.get('compare to', fallback='').split(',')),
+            price_cache_ttl=options.getint('price cache ttl', fallback=0),
+            stale_while_revalidate=options.getboolean('stale while revalidate', fallback=False),
+            # point these at benchmarks/mock_server.py to run against local stand-ins for the apis
+            coingecko_url=options.get('coingecko url', fallback=default_coingecko_url).rstrip('/') + '/',
+            beaconchain_url=options.get('beaconcha.in url', fallback=default_beaconchain_url).rstrip('/') + '/',
+            dp=DecimalPlaces(
+                fiat=decimal_places.getint('fiat', fallback=5),
+                fiat_total=decimal_places.getint('fiat total', fallback=2),
+                crypto=decimal_places.getint('crypto', fallback=5),
+                percent=decimal_places.getint('percent', fallback=3)
+            )
+        )
+
+        return _config
 
-cfg = configparser.RawConfigParser()
-
-if not config_file.is_file():
-    cfg['options'] = {
-        'default currency': 'usd',
-        'show individual validators': True,
-        'show bitcoin if not held': True,
-        'show market caps': True,
-        'show market cap percentages': True,
-        'compare to bitcoin': True,
-        'compare to ethereum': True,
-        'compare to': ''
-    }
-
-    cfg['decimal places'] = {'fiat': '5', 'fiat total': '2', 'crypto': '5', 'percent': '3'}
-
-    with config_file.open('w') as f:
-        cfg.write(f)
-
-    print(f'\n Config saved with default values. Open "{config_file}" to make changes.\n')
-
-cfg.read(config_file)
-
-currency = cfg['options'].get('default currency', fallback='usd')
-split_validators = cfg['options'].getboolean('show individual validators', fallback=False)
-show_bitcoin_if_not_held = cfg['options'].getboolean('show bitcoin if not held', fallback=True)
-show_market_caps = cfg['options'].getboolean('show market caps', fallback=True)
-show_market_cap_percentages = cfg['options'].getboolean('show market cap percentages', fallback=True)
-compare_to_btc = cfg['options'].getboolean('compare to bitcoin', fallback=True)
-compare_to_eth = cfg['options'].getboolean('compare to ethereum', fallback=True)
-_compare_to = cfg['options'].get('compare to', fallback='')
-compare_to = [x.strip() for x in _compare_to.split(',')]
-
-dp = namedtuple('dp', 'fiat fiat_total crypto percent')
-dp.fiat = cfg['decimal places'].getint('fiat', fallback=5)
-dp.fiat_total = cfg['decimal places'].getint('fiat total', fallback=2)
-dp.crypto = cfg['decimal places'].getint('crypto', fallback=5)
-dp.percent = cfg['decimal places'].getint('percent', fallback=3)
 
 # table options
 column_pad = 1
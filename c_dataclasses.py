@@ -1,12 +1,14 @@
 from dataclasses import dataclass, field, InitVar
-from typing import List, Dict, ClassVar, Optional, Union
+from typing import List, Dict, Optional, Tuple
 from functools import total_ordering
-from operator import attrgetter
-import json
-import requests
-import time
+from operator import itemgetter
+from array import array
 
-from c_constants import validators_json_file, dp, sort_vals_by_earnings, column_pad, separate_thousands
+from c_constants import load_config, sort_vals_by_earnings, column_pad, separate_thousands
+
+
+gwei_per_eth = 1000000000
+eth_per_validator = 32.0
 
 
 @dataclass
@@ -14,30 +16,52 @@ class Quantity:
     raw: float
     currency: str
     is_validator: bool = False
-    formatted: str = field(init=False)
+    dec_places: int = None
+    padding: int = None
+    _formatted: Optional[Dict[Tuple[int, int], str]] = field(init=False, default=None, repr=False, compare=False)
+
+    @property
+    def formatted(self):
+        return self.format(
+            dec_places=self.dec_places, padding=len(self.currency) if self.padding is None else self.padding
+        )
 
-    dec_places: InitVar[int] = None
-    pad_symbol: InitVar[bool] = False
+    def format(self, dec_places: int, padding: int):
+        if self._formatted is None:
+            self._formatted = {}
 
-    def __post_init__(self, dec_places: int, pad_symbol: bool):
-        currency_pad = Coin.longest_symbol if pad_symbol else len(self.currency)
-        if separate_thousands:
-            self.formatted = (
-                f'{self.raw:,.{dec_places}f} {self.currency:{currency_pad}}'
-                if self.raw > 0 or self.is_validator else ''
-            )
+        try:
+            return self._formatted[(dec_places, padding)]
 
-        else:
-            self.formatted = (
-                f'{self.raw:.{dec_places}f} {self.currency:{currency_pad}}'
+        except KeyError:
+            thousands = ',' if separate_thousands else ''
+            formatted = (
+                f'{self.raw:{thousands}.{dec_places}f} {self.currency:{padding}}'
                 if self.raw > 0 or self.is_validator else ''
             )
+            self._formatted[(dec_places, padding)] = formatted
 
+            return formatted
 
-    # def update_formatted_str(self, dec_places: int, padding: int):
-    #     self.formatted = (
-    #         f'{self.raw:,.{dec_places}f} {self.currency:<{padding}}' if self.raw > 0 or self.is_validator else ''
-    #     )
+
+blank_quantity = Quantity(raw=0, currency='')
+
+
+@dataclass
+class PortfolioSnapshot:
+    fiat_currency: str = 'USD'
+    extra_fiat_currencies: List[str] = field(default_factory=list)
+    longest_symbol: int = 3
+    comparison_coins: List['CoinBase'] = field(default_factory=list)
+    coins: List['Coin'] = field(default_factory=list)
+    total_held_in_fiat: Optional[Quantity] = None
+    extra_fiat_totals: List[Quantity] = field(default_factory=list)
+    is_staking_eth: bool = False
+
+    comp_list_total_values: List[Quantity] = field(default_factory=list)
+    comp_list_vals_staked: List[Quantity] = field(default_factory=list)
+    comp_list_vals_earned: List[Quantity] = field(default_factory=list)
+    comp_list_vals_total: List[Quantity] = field(default_factory=list)
 
 
 @dataclass
@@ -46,76 +70,134 @@ class EthSubtype:
     long_str: str = ''
     quantity: Quantity = field(init=False)
     in_fiat: Quantity = field(init=False)
-    comp_list_values_of_held: List[Union[str, Quantity]] = field(init=False, default_factory=list)
+    extra_fiat_values_of_held: List[Quantity] = field(init=False, default_factory=list)
+    comp_list_values_of_held: List[Quantity] = field(init=False, default_factory=list)
 
     raw: InitVar[float] = None
     fiat_value_of_one: InitVar[float] = None
     is_validator: InitVar[bool] = False
-
-    def __post_init__(self, raw: float, fiat_value_of_one: float, is_validator: bool):
+    snapshot: InitVar[PortfolioSnapshot] = None
+    extra_fiat_values_of_one: InitVar[List[Optional[float]]] = None
+
+    def __post_init__(
+        self, raw: float, fiat_value_of_one: float, is_validator: bool, snapshot: PortfolioSnapshot,
+        extra_fiat_values_of_one: List[Optional[float]]
+    ):
+        dp = load_config().dp
         self.quantity = Quantity(
-            raw=raw, dec_places=dp.crypto, currency='ETH', is_validator=is_validator, pad_symbol=True
+            raw=raw, dec_places=dp.crypto, currency='ETH', is_validator=is_validator,
+            padding=snapshot.longest_symbol
         )
 
         self.in_fiat = Quantity(
             raw=self.quantity.raw * fiat_value_of_one,
-            dec_places=dp.fiat_total, currency=Coin.fiat_currency, is_validator=is_validator
+            dec_places=dp.fiat_total, currency=snapshot.fiat_currency, is_validator=is_validator
         )
 
-        for comp in Coin.comparison_coins:
-            if comp.name.lower() == 'ethereum':
-                self.comp_list_values_of_held.append('')
-
-            else:
-                self.comp_list_values_of_held.append(
-                    Quantity(
-                        raw=self.in_fiat.raw / comp.value_of_one.raw, currency=comp.symbol, dec_places=dp.crypto,
-                    ).formatted
-                )
+        self.extra_fiat_values_of_held = [
+            blank_quantity if value_of_one is None else Quantity(
+                raw=self.quantity.raw * value_of_one, dec_places=dp.fiat_total, currency=currency,
+                is_validator=is_validator
+            )
+            for currency, value_of_one in zip(snapshot.extra_fiat_currencies, extra_fiat_values_of_one or [])
+        ]
 
 
-@total_ordering
-@dataclass
 class Validator:
-    index: str = field(init=False)
-    public_key: str = field(init=False)
-    val_str: str = field(init=False)
-    balance: float = field(init=False)
-    staked: EthSubtype = field(init=False)
-    total: EthSubtype = field(init=False)
-    earned: EthSubtype = field(init=False)
-    percentage: Quantity = field(init=False, default=0)
-    comp_list_staked_eth: List[Union[str, Quantity]] = field(init=False, default_factory=list)
-    comp_list_earned_eth: List[Union[str, Quantity]] = field(init=False, default_factory=list)
-    comp_list_total_eth: List[Union[str, Quantity]] = field(init=False, default_factory=list)
-
-    val_dict: InitVar[Dict] = None
-    fiat_value_of_one: InitVar[float] = None
-    longest_val_index: InitVar[int] = None
-
-    def __post_init__(self, val_dict: Dict, fiat_value_of_one: float, longest_val_index: int):
-        self.index = str(val_dict['validatorindex'])
-        self.public_key = val_dict['pubkey']
-        self.val_str = f'Validator #{self.index} earnings'
-        self.balance = val_dict['balance'] / 1000000000
-        self.staked = EthSubtype(
-            raw=32.0, short_str=f'{self.index:>{longest_val_index}}',
-            fiat_value_of_one=fiat_value_of_one, is_validator=True
-        )
-        self.earned = EthSubtype(
-            raw=self.balance - self.staked.quantity.raw, short_str=f'{self.index:>{longest_val_index}}',
-            fiat_value_of_one=fiat_value_of_one, is_validator=True
-        )
-        self.total = EthSubtype(
-            raw=self.balance, short_str=f'{self.index:>{longest_val_index}}',
-            fiat_value_of_one=fiat_value_of_one, is_validator=True
+    __slots__ = ('store', 'pos')
+
+    def __init__(self, store: 'ValidatorStore', pos: int):
+        self.store = store
+        self.pos = pos
+
+    @property
+    def index(self):
+        return self.store.indexes[self.pos]
+
+    @property
+    def public_key(self):
+        return self.store.public_keys[self.pos]
+
+    @property
+    def val_str(self):
+        return f'Validator #{self.index} earnings'
+
+    @property
+    def balance(self):
+        return self.store.total[self.pos]
+
+    @property
+    def staked(self):
+        return self._subtype('staked')
+
+    @property
+    def earned(self):
+        return self._subtype('earned')
+
+    @property
+    def total(self):
+        return self._subtype('total')
+
+    def _subtype(self, column_name: str):
+        subtype = EthSubtype(
+            raw=getattr(self.store, column_name)[self.pos], short_str=self.index,
+            fiat_value_of_one=self.store.fiat_value_of_one, is_validator=True, snapshot=self.store.snapshot,
+            extra_fiat_values_of_one=self.store.extra_fiat_values_of_one
         )
 
-    def __eq__(self, other):
-        return self.index == other.index
+        if self.store.valuation:
+            subtype.comp_list_values_of_held = self.store.valuation.row(
+                self.store.comparisons[column_name], self.pos, blanks=self.store.valuation.is_ethereum
+            )
 
-    def __lt__(self, other):
-        return self.index < other.index
+        return subtype
+
+
+@dataclass
+class ValidatorStore:
+    fiat_value_of_one: float
+    snapshot: PortfolioSnapshot = field(repr=False)
+    extra_fiat_values_of_one: List[Optional[float]] = field(default_factory=list)
+    indexes: List[str] = field(init=False, default_factory=list)
+    public_keys: List[str] = field(init=False, default_factory=list)
+    balances: array = field(init=False)
+    staked: array = field(init=False)
+    earned: array = field(init=False)
+    total: array = field(init=False)
+    valuation: Optional['Valuation'] = field(init=False, default=None)
+    comparisons: Dict[str, List[array]] = field(init=False, default_factory=dict)
+
+    bc_data: InitVar[List[Dict]] = None
+
+    def __post_init__(self, bc_data: List[Dict]):
+        if sort_vals_by_earnings:
+            bc_data = sorted(bc_data, key=itemgetter('balance'), reverse=True)
+
+        else:
+            bc_data = sorted(bc_data, key=lambda v: str(v['validatorindex']))
+
+        self.indexes = [str(v['validatorindex']) for v in bc_data]
+        self.public_keys = [v['pubkey'] for v in bc_data]
+        self.balances = array('q', [v['balance'] for v in bc_data])
+        self.total = array('d', [b / gwei_per_eth for b in self.balances])
+        self.staked = array('d', [eth_per_validator]) * len(self.balances)
+        self.earned = array('d', [t - eth_per_validator for t in self.total])
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __iter__(self):
+        return (Validator(store=self, pos=pos) for pos in range(len(self.indexes)))
+
+    def __getitem__(self, pos: int):
+        return Validator(store=self, pos=pos)
+
+    def in_fiat(self, column: array):
+        return array('d', [x * self.fiat_value_of_one for x in column])
+
+    def percentages(self):
+        total_eth = sum(self.total)
+        return array('d', [(t / total_eth) * 100 for t in self.total])
 
 
 @total_ordering
@@ -128,13 +210,16 @@ class CoinBase:
     value_of_one: Quantity = field(init=False)
 
     coin_data: InitVar[Dict] = None
+    snapshot: InitVar[PortfolioSnapshot] = None
 
-    def __post_init__(self, coin_data: Dict):
+    def __post_init__(self, coin_data: Dict, snapshot: PortfolioSnapshot):
         self.rank = coin_data['rank']
         self.name = coin_data['name']
         self.symbol = coin_data['symbol']
-        self.market_cap = Quantity(raw=coin_data['market_cap'], currency=Coin.fiat_currency, dec_places=0)
-        self.value_of_one = Quantity(raw=float(coin_data['price']), currency=Coin.fiat_currency, dec_places=dp.fiat)
+        self.market_cap = Quantity(raw=coin_data['market_cap'], currency=snapshot.fiat_currency, dec_places=0)
+        self.value_of_one = Quantity(
+            raw=float(coin_data['price']), currency=snapshot.fiat_currency, dec_places=load_config().dp.fiat
+        )
 
     def __eq__(self, other):
         return self.rank == other.rank
@@ -146,30 +231,14 @@ class CoinBase:
 @total_ordering
 @dataclass
 class Coin(CoinBase):
-    comparison_coins: ClassVar[List[CoinBase]]
-    total_held_in_fiat: ClassVar[Quantity]
-    fiat_currency: ClassVar[str] = 'USD'
-    comp_list_total_values: ClassVar[List[Quantity]] = []
-    max_width_m_cap_percs: ClassVar[List[int]] = []
-    max_width_prices_of_1: ClassVar[List[int]] = []
-    max_width_values_of_held: ClassVar[List[int]] = []
-    max_width_vals_staked: ClassVar[List[int]] = []
-    max_width_vals_earned: ClassVar[List[int]] = []
-    max_width_vals_total: ClassVar[List[int]] = []
-    longest_symbol: ClassVar[int]
-    is_staking_eth: ClassVar[bool] = False
-    debug: ClassVar[bool] = False
-    test: ClassVar[bool] = False
-
-    comp_list_m_cap_percs: List[str] = field(init=False, default_factory=list)
-    comp_list_prices_of_1: List[str] = field(init=False, default_factory=list)
-    comp_list_values_of_held: List[str] = field(init=False, default_factory=list)
-    comp_list_vals_staked: ClassVar[List[str]] = []
-    comp_list_vals_earned: ClassVar[List[str]] = []
-    comp_list_vals_total: ClassVar[List[str]] = []
+    comp_list_m_cap_percs: List[Quantity] = field(init=False, default_factory=list)
+    comp_list_prices_of_1: List[Quantity] = field(init=False, default_factory=list)
+    comp_list_values_of_held: List[Quantity] = field(init=False, default_factory=list)
 
     total_held: Optional[Quantity] = field(init=False, default=None)
     value_of_held: Quantity = field(init=False)
+    extra_fiat_values_of_one: List[Optional[float]] = field(init=False, default_factory=list)
+    extra_fiat_values_of_held: List[Quantity] = field(init=False, default_factory=list)
     perc_of_total: Quantity = field(init=False, default=0)
 
     qty_held: Optional[EthSubtype] = field(init=False, default=None)
@@ -177,49 +246,43 @@ class Coin(CoinBase):
     qty_earned: Optional[EthSubtype] = field(init=False, default=None)
 
     validator_indexes: List[str] = field(init=False, default_factory=list)
-    validators: List[Validator] = field(init=False, default_factory=list)
+    validators: Optional[ValidatorStore] = field(init=False, default=None)
+
+    def __post_init__(self, coin_data: Dict, snapshot: PortfolioSnapshot):
+        super().__post_init__(coin_data=coin_data, snapshot=snapshot)
 
-    def __post_init__(self, coin_data: Dict):
-        super().__post_init__(coin_data=coin_data)
+        fiat_prices = coin_data.get('fiat_prices', {})
+        self.extra_fiat_values_of_one = [fiat_prices.get(currency) for currency in snapshot.extra_fiat_currencies]
 
         if self.name.lower() == 'ethereum':
             self.qty_held = EthSubtype(
-                raw=coin_data['held'], short_str='Held', long_str='Held', fiat_value_of_one=self.value_of_one.raw
+                raw=coin_data['held'], short_str='Held', long_str='Held', fiat_value_of_one=self.value_of_one.raw,
+                snapshot=snapshot, extra_fiat_values_of_one=self.extra_fiat_values_of_one
             )
 
             self.validator_indexes = coin_data.get('validators')
 
             if self.validator_indexes:
-                bc_data = self.get_beaconchain_data()
-
-                longest_val_index = len(str(max([str(x['validatorindex']) for x in bc_data], key=len)))
-
-                self.validators = [
-                    Validator(
-                        val_dict=v, fiat_value_of_one=self.value_of_one.raw, longest_val_index=longest_val_index
-                    )
-                    for v in bc_data
-                ]
-
-                if sort_vals_by_earnings:
-                    self.validators.sort(key=attrgetter('earned.quantity.raw'), reverse=True)
-
-                else:
-                    self.validators.sort()
+                self.validators = ValidatorStore(
+                    bc_data=coin_data['validators_data'], fiat_value_of_one=self.value_of_one.raw, snapshot=snapshot,
+                    extra_fiat_values_of_one=self.extra_fiat_values_of_one
+                )
 
                 self.qty_staked = EthSubtype(
-                    raw=sum([v.staked.quantity.raw for v in self.validators]),
+                    raw=sum(self.validators.staked),
                     short_str='Staked', long_str='Total staked',
-                    fiat_value_of_one=self.value_of_one.raw
+                    fiat_value_of_one=self.value_of_one.raw, snapshot=snapshot,
+                    extra_fiat_values_of_one=self.extra_fiat_values_of_one
                 )
 
                 self.qty_earned = EthSubtype(
-                    raw=sum([v.earned.quantity.raw for v in self.validators]),
+                    raw=sum(self.validators.earned),
                     short_str='Earned', long_str='Total earned',
-                    fiat_value_of_one=self.value_of_one.raw, is_validator=True
+                    fiat_value_of_one=self.value_of_one.raw, is_validator=True, snapshot=snapshot,
+                    extra_fiat_values_of_one=self.extra_fiat_values_of_one
                 )
 
-                Coin.is_staking_eth = True
+                snapshot.is_staking_eth = True
 
             else:
                 self.qty_staked = None
@@ -234,164 +297,128 @@ class Coin(CoinBase):
         else:
             total_held = coin_data['held']
 
-        self.total_held = Quantity(raw=total_held, dec_places=dp.crypto, currency=self.symbol, pad_symbol=True)
+        dp = load_config().dp
+        self.total_held = Quantity(
+            raw=total_held, dec_places=dp.crypto, currency=self.symbol, padding=snapshot.longest_symbol
+        )
         self.value_of_held = Quantity(
-            raw=self.total_held.raw * self.value_of_one.raw, currency=Coin.fiat_currency, dec_places=dp.fiat_total
+            raw=self.total_held.raw * self.value_of_one.raw, currency=snapshot.fiat_currency,
+            dec_places=dp.fiat_total
         )
+        self.extra_fiat_values_of_held = [
+            blank_quantity if value_of_one is None else Quantity(
+                raw=self.total_held.raw * value_of_one, currency=currency, dec_places=dp.fiat_total
+            )
+            for currency, value_of_one in zip(snapshot.extra_fiat_currencies, self.extra_fiat_values_of_one)
+        ]
 
-        for comp in Coin.comparison_coins:
-            if self.name == comp.name:
-                self.comp_list_m_cap_percs.append('')
-                self.comp_list_prices_of_1.append('')
-                self.comp_list_values_of_held.append('')
-
-            else:
-                if self.name.lower() == 'ethereum' and Coin.is_staking_eth:
-                    for v in self.validators:
-                        v.comp_list_staked_eth.append(
-                            Quantity(
-                                raw=v.staked.in_fiat.raw / comp.value_of_one.raw,
-                                currency=comp.symbol, dec_places=dp.crypto
-                            ).formatted
-                        )
-
-                        v.comp_list_earned_eth.append(
-                            Quantity(
-                                raw=v.earned.in_fiat.raw / comp.value_of_one.raw,
-                                currency=comp.symbol, dec_places=dp.crypto
-                            ).formatted
-                        )
-
-                        v.comp_list_total_eth.append(
-                            Quantity(
-                                raw=v.total.in_fiat.raw / comp.value_of_one.raw,
-                                currency=comp.symbol, dec_places=dp.crypto
-                            ).formatted
-                        )
-
-                self.comp_list_m_cap_percs.append(
-                    Quantity(
-                        raw=(self.market_cap.raw / comp.market_cap.raw) * 100, currency='%', dec_places=dp.percent,
-                    ).formatted
-                )
-
-                self.comp_list_prices_of_1.append(
-                    Quantity(
-                        raw=self.value_of_one.raw / comp.value_of_one.raw, currency=comp.symbol, dec_places=dp.crypto,
-                    ).formatted
-                )
-
-                self.comp_list_values_of_held.append(
-                    Quantity(
-                        raw=self.value_of_held.raw / comp.value_of_one.raw, currency=comp.symbol, dec_places=dp.crypto,
-                    ).formatted
-                )
-
-        if self.name.lower() == 'ethereum' and Coin.is_staking_eth:
-            for comp in Coin.comparison_coins:
-                self.comp_list_vals_staked.append(
-                    Quantity(
-                        raw=self.qty_staked.in_fiat.raw / comp.value_of_one.raw,
-                        currency=comp.symbol, dec_places=dp.crypto
-                    ).formatted
-                )
-
-                self.comp_list_vals_earned.append(
-                    Quantity(
-                        raw=self.qty_earned.in_fiat.raw / comp.value_of_one.raw,
-                        currency=comp.symbol, dec_places=dp.crypto
-                    ).formatted
-                )
-
-                self.comp_list_vals_total.append(
-                    Quantity(
-                        raw=(self.qty_staked.in_fiat.raw + self.qty_earned.in_fiat.raw) / comp.value_of_one.raw,
-                        currency=comp.symbol, dec_places=dp.crypto
-                    ).formatted
-                )
-
-            Coin.max_width_vals_staked = [len(x) for x in Coin.comp_list_vals_staked]
-            Coin.max_width_vals_earned = [len(x) for x in Coin.comp_list_vals_earned]
-            Coin.max_width_vals_total = [len(x) for x in Coin.comp_list_vals_total]
-
-    def get_beaconchain_data(self):
-        start = time.perf_counter()
-        update_saved_data = False
-
-        if Coin.test and validators_json_file.is_file():
-            if Coin.debug:
-                print(
-                    f' {time.strftime("%H:%M:%S")} beaconcha.in data file ("{validators_json_file}") found, loading... ',
-                    end='', flush=True
-                )
-
-            with validators_json_file.open() as f:
-                bc_data = json.load(f)
+    def __eq__(self, other):
+        return self.rank == other.rank
 
-        else:
-            if Coin.debug:
-                print(f' {time.strftime("%H:%M:%S")} downloading fresh beaconcha.in data... ', end='', flush=True)
-                
-            url = f'https://beaconcha.in/api/v1/validator/{",".join(self.validator_indexes)}'
-
-            try:
-                bc_data = requests.get(url).json()
-
-            except json.decoder.JSONDecodeError:
-                if validators_json_file.is_file():
-                    print(
-                        ' Bad JSON from beaconcha.in, loading locally saved validator balances from the last '
-                        'successful call...'
-                    )
-                    with validators_json_file.open() as f:
-                        bc_data = json.load(f)
-
-                else:
-                    print(' Bad JSON from beaconcha.in, no locally saved validator balances found.')
-                    exit()
+    def __lt__(self, other):
+        return self.rank < other.rank
 
-            else:
-                update_saved_data = True
-            
-        if Coin.debug:
-            print(f'done ({(time.perf_counter() - start):.3f}s)')
 
-        if update_saved_data:
-            if Coin.debug:
-                start = time.perf_counter()
-                print(f' {time.strftime("%H:%M:%S")} saving fresh beaconcha.in data ("{validators_json_file}")... ',
-                      end='', flush=True)
+@dataclass
+class Valuation:
+    snapshot: PortfolioSnapshot
+    comparison_coins: List[CoinBase] = field(init=False)
+    names: List[str] = field(init=False)
+    symbols: List[str] = field(init=False)
+    prices: array = field(init=False)
+    market_caps: array = field(init=False)
+    is_ethereum: List[bool] = field(init=False)
 
-            with validators_json_file.open('w') as f:
-                json.dump(bc_data, f)
+    def __post_init__(self):
+        self.comparison_coins = self.snapshot.comparison_coins
+        self.names = [c.name for c in self.comparison_coins]
+        self.symbols = [c.symbol for c in self.comparison_coins]
+        self.prices = array('d', [c.value_of_one.raw for c in self.comparison_coins])
+        self.market_caps = array('d', [c.market_cap.raw for c in self.comparison_coins])
+        self.is_ethereum = [name.lower() == 'ethereum' for name in self.names]
+
+    def in_comparison(self, fiat_values):
+        return [array('d', [v / price for v in fiat_values]) for price in self.prices]
+
+    def m_cap_percentages(self, market_caps):
+        return [array('d', [(m / comp_m_cap) * 100 for m in market_caps]) for comp_m_cap in self.market_caps]
+
+    def row(self, columns: List[array], pos: int, blanks: List[bool] = None, currency: str = None, dec_places=None):
+        dec_places = load_config().dp.crypto if dec_places is None else dec_places
+
+        return [
+            blank_quantity if blanks and blanks[c_idx] else Quantity(
+                raw=column[pos], currency=currency or self.symbols[c_idx],
+                dec_places=dec_places
+            )
+            for c_idx, column in enumerate(columns)
+        ]
+
+    def apply(self, coins: List[Coin]):
+        dp = load_config().dp
+        m_cap_percs = self.m_cap_percentages([c.market_cap.raw for c in coins])
+        prices_of_1 = self.in_comparison([c.value_of_one.raw for c in coins])
+        values_of_held = self.in_comparison([c.value_of_held.raw for c in coins])
+
+        for pos, coin in enumerate(coins):
+            blanks = [coin.name == name for name in self.names]
+            coin.comp_list_m_cap_percs = self.row(m_cap_percs, pos, blanks, currency='%', dec_places=dp.percent)
+            coin.comp_list_prices_of_1 = self.row(prices_of_1, pos, blanks)
+            coin.comp_list_values_of_held = self.row(values_of_held, pos, blanks)
+
+            subtypes = [s for s in (coin.qty_held, coin.qty_staked, coin.qty_earned) if s]
+            if subtypes:
+                subtype_values = self.in_comparison([s.in_fiat.raw for s in subtypes])
+                for s_pos, subtype in enumerate(subtypes):
+                    subtype.comp_list_values_of_held = self.row(subtype_values, s_pos, blanks=self.is_ethereum)
+
+            if coin.validators:
+                self.apply_validators(coin)
+
+        self.snapshot.comp_list_total_values = self.row(
+            self.in_comparison([self.snapshot.total_held_in_fiat.raw]), 0
+        )
 
-            if Coin.debug:
-                print(f'done ({time.perf_counter() - start:,.3f}s)')
+    def apply_validators(self, coin: Coin):
+        store = coin.validators
+        store.valuation = self
+        store.comparisons = {
+            column_name: self.in_comparison(store.in_fiat(getattr(store, column_name)))
+            for column_name in ('staked', 'earned', 'total')
+        }
 
-        data = bc_data['data']
+        totals = self.in_comparison([
+            coin.qty_staked.in_fiat.raw, coin.qty_earned.in_fiat.raw,
+            coin.qty_staked.in_fiat.raw + coin.qty_earned.in_fiat.raw
+        ])
+        self.snapshot.comp_list_vals_staked = self.row(totals, 0, blanks=self.is_ethereum)
+        self.snapshot.comp_list_vals_earned = self.row(totals, 1, blanks=self.is_ethereum)
+        self.snapshot.comp_list_vals_total = self.row(totals, 2, blanks=self.is_ethereum)
 
-        if Coin.debug:
-            print()
 
-        return data if isinstance(data, list) else [data]
+@dataclass
+class TableCol:
+    width: int = 0
+    align: str = '>'
+    header_align: Optional[str] = None
 
-    def __eq__(self, other):
-        return self.rank == other.rank
-
-    def __lt__(self, other):
-        return self.rank < other.rank
+    @property
+    def w_pad(self):
+        return self.width + (2 * column_pad)
 
 
 @dataclass
-class TableCol:
-    width: int
-    w_pad: int = field(init=False)
+class TableSection:
+    name: str
+    cols: List[TableCol]
+    thick: bool = True
 
-    def __post_init__(self):
-        self.w_pad = self.width + (2 * column_pad)
+    @property
+    def w_pad(self):
+        return sum(c.w_pad for c in self.cols)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ElementRow:
     left: str
     mid_thin: str
@@ -412,3 +439,74 @@ class Elements:
     hor_thick: str = '\u2550'
 
     bot_left: str = '\u2558'
+
+
+@dataclass
+class TableLayout:
+    sections: List[TableSection]
+    e: Elements = field(default_factory=Elements)
+
+    def _range(self, start: str = None, stop: str = None):
+        names = [s.name for s in self.sections]
+        return range(names.index(start) if start else 0, names.index(stop) if stop else len(names))
+
+    def _ver(self, idx: int):
+        if idx < len(self.sections) and not self.sections[idx].thick:
+            return self.e.ver_thin
+
+        return self.e.ver_thick
+
+    def offset(self, name: str):
+        return sum(1 + s.w_pad for s in self.sections[:self._range(stop=name).stop])
+
+    def fit(self, rows, start: str = None):
+        cols = [c for idx in self._range(start=start) for c in self.sections[idx].cols]
+
+        for row in rows:
+            for col, cell in zip(cols, row):
+                if len(cell) > col.width:
+                    col.width = len(cell)
+
+    def rule(self, row: ElementRow, hor: str, start: str = None, stop: str = None, joints=None, left=None, right=None):
+        joints = joints or {}
+        idxs = self._range(start=start, stop=stop)
+        parts = [left or row.left]
+
+        for idx in idxs:
+            section = self.sections[idx]
+
+            if idx > idxs.start:
+                joint = joints.get(section.name, row)
+                parts.append(joint.mid_thick if section.thick else joint.mid_thin)
+
+            parts.append(hor * section.w_pad)
+
+        parts.append(right or row.right)
+
+        return ''.join(parts)
+
+    def template(self, start: str = None, stop: str = None, merge=(), header=False):
+        col_pad = ' ' * column_pad
+        idxs = self._range(start=start, stop=stop)
+        parts = []
+
+        for idx in idxs:
+            section = self.sections[idx]
+            parts.append(self._ver(idx))
+
+            if section.name in merge:
+                cells = [(section.cols[0], section.w_pad - (2 * column_pad))]
+
+            else:
+                cells = [(col, col.width) for col in section.cols]
+
+            for col, width in cells:
+                align = col.header_align or col.align if header else col.align
+                parts.append(f'{col_pad}{{:{align}{width}}}{col_pad}')
+
+        parts.append(self._ver(idxs.stop))
+
+        return ''.join(parts)
+
+    def blank(self):
+        return self.template(merge=[s.name for s in self.sections]).format(*[''] * len(self.sections))
@@ -1,33 +1,36 @@
+import sys
 import time
 import configparser
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-from c_api import is_valid_currency, get_coins_list, get_coin_prices
+from c_api import is_valid_currency, get_coin_prices, get_fiat_prices, get_beaconchain_data
+from c_index import get_coin_index
+from c_http import print_host_stats
+from c_history import History
+from c_profile import span, in_current_span
 
 from c_constants import (
-    holdings_file, split_validators, show_bitcoin_if_not_held, dp,
-    details_in_name_col, show_market_caps, show_market_cap_percentages,
-    compare_to_btc, compare_to_eth, compare_to, column_pad
+    load_config, holdings_file, details_in_name_col, validators_per_page, render_chunk_lines, history_db_file
 )
 
-from c_dataclasses import Coin, CoinBase, Validator, Quantity, Elements, TableCol
+from c_dataclasses import (
+    gwei_per_eth, Coin, CoinBase, PortfolioSnapshot, ValidatorStore, Valuation, Quantity, TableCol, TableSection,
+    TableLayout, blank_quantity
+)
 
 
-def get_holdings(debug=False, comparison_coins=None, validator_mode=False, update=False):
+def get_holdings(
+    debug=False, comparison_coins=None, validator_mode=False, update=False, holdings_path=holdings_file,
+    coin_index=None, matches=None
+):
     def match_coin(coin_id):
-        coin_ids = []
-        close_matches = []
-        for coin in coins_list:
-            coin_names = [coin['id'].lower(), coin['symbol'].lower(), coin['name'].lower()]
-
-            if coin_id.lower() in coin_names:
-                coin_ids.append(coin)
+        # in batch mode the same entry is often in several holdings files, so it's only looked up (or asked about) once
+        if matches is not None and coin_id in matches:
+            return matches[coin_id]
 
-            else:
-                for coin_name in coin_names:
-                    if coin_id.lower() in coin_name:
-                        close_matches.append(coin_names)
-                        break
+        coin_ids = coin_index.exact_matches(coin_id)
+        close_matches = [] if coin_ids else coin_index.partial_matches(coin_id)
 
         if coin_ids:
             if len(coin_ids) > 1:
@@ -69,9 +72,16 @@ def get_holdings(debug=False, comparison_coins=None, validator_mode=False, updat
 
             sel_coin_id = None
 
+        if matches is not None:
+            matches[coin_id] = sel_coin_id
+
         return sel_coin_id
 
-    coins_list = get_coins_list(debug=debug, update=update)
+    config = load_config()
+
+    if coin_index is None:
+        with span('coin index'):
+            coin_index = get_coin_index(debug=debug, update=update)
 
     matched_comp_coins = []
     for c in comparison_coins:
@@ -86,31 +96,32 @@ def get_holdings(debug=False, comparison_coins=None, validator_mode=False, updat
             comparison[c] = {}
 
     else:
-        if compare_to_btc:
+        if config.compare_to_btc:
             comparison['bitcoin'] = {}
 
-        if compare_to_eth and not validator_mode:
+        if config.compare_to_eth and not validator_mode:
             comparison['ethereum'] = {}
 
         if matched_comp_coins:
             comparison[match_coin(matched_comp_coins[0])] = {}
 
     if len(comparison) < 3:
-        if 'bitcoin' not in comparison and compare_to_btc:
+        if 'bitcoin' not in comparison and config.compare_to_btc:
             comparison['bitcoin'] = {}
 
     if len(comparison) < 3 and not validator_mode:
-        if 'ethereum' not in comparison and compare_to_eth:
+        if 'ethereum' not in comparison and config.compare_to_eth:
             comparison['ethereum'] = {}
 
     start = time.perf_counter()
     if debug:
         print(
-            f' {time.strftime("%H:%M:%S")} holdings file ("{holdings_file}") found, loading... ', end='', flush=True
+            f' {time.strftime("%H:%M:%S")} holdings file ("{holdings_path}") found, loading... ', end='', flush=True
         )
 
-    cfg = configparser.RawConfigParser()
-    cfg.read(holdings_file)
+    with span('holdings parse', file=holdings_path.name):
+        cfg = configparser.RawConfigParser()
+        cfg.read(holdings_path)
 
     holdings = {}
 
@@ -142,7 +153,8 @@ def get_holdings(debug=False, comparison_coins=None, validator_mode=False, updat
 
     cfg_updated = False
     for other_coin_id in other_coins:
-        selected_coin_id = match_coin(other_coin_id)
+        with span('match coin', entry=other_coin_id):
+            selected_coin_id = match_coin(other_coin_id)
 
         if not selected_coin_id:
             continue
@@ -163,15 +175,15 @@ def get_holdings(debug=False, comparison_coins=None, validator_mode=False, updat
 
             cfg_updated = True
 
-    if show_bitcoin_if_not_held and 'bitcoin' not in holdings.keys() and 'btc' not in holdings.keys():
+    if config.show_bitcoin_if_not_held and 'bitcoin' not in holdings.keys() and 'btc' not in holdings.keys():
         holdings['bitcoin'] = {'held': 0, 'comparison_only': True}
 
     if cfg_updated:
         if debug:
             start = time.perf_counter()
-            print(f' {time.strftime("%H:%M:%S")} updating holdings file ("{holdings_file}")... ', end='', flush=True)
+            print(f' {time.strftime("%H:%M:%S")} updating holdings file ("{holdings_path}")... ', end='', flush=True)
 
-        with holdings_file.open('w') as f:
+        with holdings_path.open('w') as f:
             cfg.write(f)
 
         if debug:
@@ -180,493 +192,597 @@ def get_holdings(debug=False, comparison_coins=None, validator_mode=False, updat
     return {'holdings': holdings, 'comparison': comparison}
 
 
+def get_validator_indexes(holdings_path=holdings_file):
+    cfg = configparser.RawConfigParser()
+    cfg.read(holdings_path)
+
+    for section in ['ethereum', 'eth']:
+        if cfg.has_section(section):
+            validators = cfg[section].get('validators', None)
+            return [v.strip() for v in validators.split(',')] if validators else []
+
+    return []
+
+
+def _timed(timings, stage, func, **kwargs):
+    start = time.perf_counter()
+
+    try:
+        with span(stage):
+            return func(**kwargs)
+
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
 def prepare_data(fiat_currency, args):
-    print(f'\n {time.strftime("%A - %Y/%m/%d - %X")}\n')
+    fiat_currency, coins_json = fetch_data(fiat_currency=fiat_currency, args=args)
 
-    Coin.debug = debug = args.debug
-    Coin.test = test = args.test
+    with span('build snapshot'):
+        return build_snapshot(coins_json=coins_json, fiat_currency=fiat_currency, validator_mode=args.validators)
 
-    if not is_valid_currency(fiat_currency):
-        print(f' {time.strftime("%H:%M:%S")} invalid currency "{fiat_currency}" specified - reverting to "USD".')
-        fiat_currency = 'USD'
 
-        if not debug:
-            print()
+def fetch_data(fiat_currency, args, fresh=False):
+    print(f'\n {time.strftime("%A - %Y/%m/%d - %X")}\n')
+
+    debug = args.debug
+    test = args.test
 
-    Coin.fiat_currency = fiat_currency
+    timings = {}
+    start = time.perf_counter()
+    validator_indexes = get_validator_indexes()
 
-    coins_json = get_holdings(
-        debug=debug, comparison_coins=args.compare_to if args.compare_to else compare_to,
+    # matching holdings can stop to ask which coin was meant, so it's done before anything runs alongside it
+    coins_json = _timed(
+        timings, 'holdings', get_holdings,
+        debug=debug, comparison_coins=args.compare_to if args.compare_to else load_config().compare_to,
         validator_mode=args.validators, update=args.update_coins_list
     )
-    coins_json = get_coin_prices(coins=coins_json, currency=Coin.fiat_currency, debug=debug, test=test)
 
-    coins_json['holdings'] = {
-        cj: coins_json['holdings'][cj] for cj in coins_json['holdings']
-        if coins_json['holdings'][cj].get('symbol') and coins_json['holdings'][cj].get('rank')
-    }
+    # the workers don't print their own progress, their timings are printed here once each one is finished
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        valid_currency = executor.submit(
+            in_current_span(_timed), timings, 'currency', is_valid_currency,
+            currency=fiat_currency, update=args.update_coins_list
+        )
+        validators_data = executor.submit(
+            in_current_span(_timed), timings, 'validators', get_beaconchain_data,
+            validator_indexes=validator_indexes, test=test
+        ) if validator_indexes else None
 
-    if args.validators:
-        Coin.longest_symbol = 3
+        if not valid_currency.result():
+            print(f' {time.strftime("%H:%M:%S")} invalid currency "{fiat_currency}" specified - reverting to "USD".')
+            fiat_currency = 'USD'
 
-    else:
-        Coin.longest_symbol = len(
-            max([coins_json['holdings'][c]['symbol'] for c in coins_json['holdings']], key=len)
-        )
+            if not debug:
+                print()
 
-    Coin.comparison_coins = [CoinBase(coin_data=coins_json['comparison'][c]) for c in coins_json['comparison']]
-    Coin.comparison_coins.sort()
+        elif debug:
+            print(f' {time.strftime("%H:%M:%S")} checked currency "{fiat_currency}" ({timings["currency"]:,.3f}s)')
 
-    coins = [Coin(coin_data=coins_json['holdings'][c]) for c in coins_json['holdings']]
+        extra_fiat_currencies = get_extra_fiat_currencies(fiat_currency, args)
 
-    Coin.total_held_in_fiat = Quantity(
-        raw=sum([c.value_of_held.raw for c in coins]), dec_places=dp.fiat_total, currency=Coin.fiat_currency
-    )
+        coins_json = _timed(
+            timings, 'prices', get_coin_prices,
+            coins=coins_json, currency=fiat_currency, debug=debug, test=test, fresh=fresh,
+            extra_currencies=extra_fiat_currencies
+        )
 
-    for coin in coins:
-        perc_of_total = (coin.value_of_held.raw / Coin.total_held_in_fiat.raw) * 100
-        coin.perc_of_total = Quantity(raw=perc_of_total, currency='%', dec_places=dp.percent)
+        if validators_data:
+            validators_data = validators_data.result()
+
+            if debug:
+                print(
+                    f' {time.strftime("%H:%M:%S")} fetched {len(validator_indexes)} validators '
+                    f'({timings["validators"]:,.3f}s)'
+                )
 
-    for c in Coin.comparison_coins:
-        Coin.comp_list_total_values.append(
-            Quantity(
-                raw=Coin.total_held_in_fiat.raw / c.value_of_one.raw, currency=c.symbol, dec_places=dp.crypto
-            ).formatted
+            if 'ethereum' in coins_json['holdings']:
+                coins_json['holdings']['ethereum']['validators_data'] = validators_data
+
+        coins_json = _timed(
+            timings, 'fiat prices', add_fiat_prices,
+            coins_json=coins_json, extra_fiat_currencies=extra_fiat_currencies, debug=debug, test=test
         )
 
-    for idx, comp in enumerate(Coin.comparison_coins):
-        Coin.max_width_m_cap_percs.append(len(max([hold.comp_list_m_cap_percs[idx] for hold in coins], key=len)))
-        Coin.max_width_prices_of_1.append(len(max([hold.comp_list_prices_of_1[idx] for hold in coins], key=len)))
-        inc_totals = [hold.comp_list_values_of_held[idx] for hold in coins] + [Coin.comp_list_total_values[idx]]
-        Coin.max_width_values_of_held.append(len(max(inc_totals, key=len)))
+    if debug:
+        stages = ', '.join(f'{stage} {elapsed:,.3f}s' for stage, elapsed in timings.items())
+        print(f' {time.strftime("%H:%M:%S")} fetch stages: {stages} (total {time.perf_counter() - start:,.3f}s)')
 
-    return sorted(coins)
+        print_host_stats()
+        print()
 
+    return fiat_currency, coins_json
 
-def display_data(coins):
-    thin_held_sides = False
-    col_pad = " " * column_pad
-    e = Elements()
-
-    len_rank = TableCol(width=max(3, len(str(max([c.rank for c in coins]))))+1)
-    len_name = TableCol(width=max(9 if Coin.is_staking_eth else 4, len(str(max([c.name for c in coins], key=len)))))
-    len_m_cap = TableCol(width=len(max([c.market_cap.formatted for c in coins], key=len)))
-    len_price_of_1 = TableCol(width=max(10, len(max([c.value_of_one.formatted for c in coins], key=len))))
-    len_held = TableCol(width=len(max([c.total_held.formatted for c in coins], key=len)))
-    len_value_of_held = TableCol(width=max(10, len(Coin.total_held_in_fiat.formatted)))
-    len_perc = TableCol(width=len(max([c.perc_of_total.formatted for c in coins], key=len)))
-
-    extra_cols_perc = [TableCol(x) for x in Coin.max_width_m_cap_percs]
-    extra_cols_price_of_1 = [TableCol(x) for x in Coin.max_width_prices_of_1]
-    extra_cols_value_of_held = [TableCol(x) for x in Coin.max_width_values_of_held]
-
-    header_str_m_cap = f'{e.ver_thick}{col_pad}{"Market cap":^{len_m_cap.width}}{col_pad}' if show_market_caps else ''
-    header_str_price_of_1 = f'{col_pad}{"Price of 1":^{len_price_of_1.width}}{col_pad}'
-    header_str_value_of_held = f'{col_pad}{"Value held":^{len_value_of_held.width}}{col_pad}'
-    footer_str_total = f'{col_pad}{Coin.total_held_in_fiat.formatted:>{len_value_of_held.width}}{col_pad}'
-
-    for idx, comp in enumerate(Coin.comp_list_total_values):
-        footer_str_total += f'{col_pad}{comp:>{Coin.max_width_values_of_held[idx]}}{col_pad}'
-
-    section_width_m_cap = len_m_cap.w_pad
-
-    if show_market_caps and show_market_cap_percentages:
-        section_width_m_cap += sum([c.w_pad for c in extra_cols_perc])
-
-    section_width_price_of_1 = len_price_of_1.w_pad + sum([c.w_pad for c in extra_cols_price_of_1])
-    section_width_value_held = len_value_of_held.w_pad + sum([c.w_pad for c in extra_cols_value_of_held])
-
-    for idx, comp_coin in enumerate(Coin.comparison_coins):
-        if show_market_caps and show_market_cap_percentages:
-            _m_cap = f'{f"% of {comp_coin.symbol}":>{Coin.max_width_m_cap_percs[idx]}}'
-            header_str_m_cap += f'{col_pad}{_m_cap}{col_pad}'
-
-        _price_of_1 = f'{f"in {comp_coin.symbol}":>{Coin.max_width_prices_of_1[idx]}}'
-        header_str_price_of_1 += f'{col_pad}{_price_of_1}{col_pad}'
-        _value_of_held = f'{f"in {comp_coin.symbol}":>{Coin.max_width_values_of_held[idx]}}'
-        header_str_value_of_held += f'{col_pad}{_value_of_held}{col_pad}'
-
-    m_cap_top = e.top.mid_thick
-    m_cap_mid_thick = e.mid_thick.mid_thick
-    m_cap_mid_thin = e.mid_thin.mid_thick
-    m_cap_blank = e.ver_thick
-    m_cap_bottom = e.bot.mid_thick
-    len_m_cap_bottom = 0
-
-    if show_market_caps:
-        m_cap_top += f'{e.hor_thick * section_width_m_cap}{e.top.mid_thick}'
-        m_cap_mid_thick += f'{e.hor_thick * section_width_m_cap}{e.mid_thick.mid_thick}'
-        m_cap_mid_thin += f'{e.hor_thin * section_width_m_cap}{e.mid_thin.mid_thick}'
-        m_cap_blank += f'{" " * section_width_m_cap}{e.ver_thick}'
-        m_cap_bottom += f'{e.hor_thick * section_width_m_cap}{e.bot.mid_thick}'
-        len_m_cap_bottom += section_width_m_cap + 1
-
-    held_top = e.top.mid_thin if thin_held_sides else e.top.mid_thick
-    held_ver = e.ver_thin if thin_held_sides else e.ver_thick
-    held_mid_thick = e.mid_thick.mid_thin if thin_held_sides else e.mid_thick.mid_thick
-    held_mid_thin = e.mid_thin.mid_thin if thin_held_sides else e.mid_thin.mid_thick
-    held_bottom_cross = e.mid_thick.mid_thin if thin_held_sides else e.mid_thick.mid_thick
-    held_bottom = e.bot.mid_thin if thin_held_sides else e.bot.mid_thick
-
-    top = (
-        f'{e.top.left}{e.hor_thick * len_rank.w_pad}{e.top.mid_thick}'
-        f'{e.hor_thick * len_name.w_pad}{m_cap_top}'
-        f'{e.hor_thick * section_width_price_of_1}'
-        f'{held_top}{e.hor_thick * len_held.w_pad}{held_top}'
-        f'{e.hor_thick * section_width_value_held}{e.top.right}'
-    )
 
-    header = (
-        f'{e.ver_thick}{col_pad}Rank{col_pad}'
-        f'{e.ver_thick}{col_pad}{"Name":<{len_name.width}}{col_pad}'
-        f'{header_str_m_cap}'
-        f'{e.ver_thick}{header_str_price_of_1}'
-        f'{held_ver}{col_pad}{"Held":^{len_held.width}}{col_pad}{held_ver}'
-        f'{header_str_value_of_held}{e.ver_thick}'
-    )
+def get_extra_fiat_currencies(fiat_currency, args):
+    extra_fiat_currencies = []
+    for currency in (args.fiat_currency or [])[1:]:
+        currency = currency.upper()
+        if currency == fiat_currency or currency in extra_fiat_currencies:
+            continue
 
-    mid_thick = (
-        f'{e.mid_thick.left}{e.hor_thick * len_rank.w_pad}{e.mid_thick.mid_thick}'
-        f'{e.hor_thick * len_name.w_pad}{m_cap_mid_thick}'
-        f'{e.hor_thick * section_width_price_of_1}'
-        f'{held_mid_thick}{e.hor_thick * len_held.w_pad}{held_mid_thick}'
-        f'{e.hor_thick * section_width_value_held}{e.mid_thick.mid_thick}'
-        f'{e.hor_thick * len_perc.w_pad}{e.top.right}'
-    )
+        if is_valid_currency(currency=currency, debug=args.debug):
+            extra_fiat_currencies.append(currency)
 
-    mid_thin = (
-        f'{e.mid_thin.left}{e.hor_thin * len_rank.w_pad}{e.mid_thin.mid_thick}'
-        f'{e.hor_thin * len_name.w_pad}{m_cap_mid_thin}'
-        f'{e.hor_thin * section_width_price_of_1}'
-        f'{held_mid_thin}{e.hor_thin * len_held.w_pad}{held_mid_thin}'
-        f'{e.hor_thin * section_width_value_held}{e.mid_thin.mid_thick}'
-        f'{e.hor_thin * len_perc.w_pad}{e.mid_thin.right}'
-    )
+        else:
+            print(f' {time.strftime("%H:%M:%S")} invalid currency "{currency}" specified - skipping it.')
 
-    blank_line = (
-        f'{e.ver_thick}{" " * len_rank.w_pad}{e.ver_thick}{" " * len_name.w_pad}'
-        f'{m_cap_blank}{" " * section_width_price_of_1}'
-        f'{held_ver}{" " * len_held.w_pad}{held_ver}'
-        f'{" " * section_width_value_held}{e.ver_thick}'
-        f'{" " * len_perc.w_pad}{e.ver_thick}'
-    )
+    return extra_fiat_currencies
 
-    bottom = (
-        f'{e.bot.left}{e.hor_thick * len_rank.w_pad}{e.bot.mid_thick}{e.hor_thick * len_name.w_pad}'
-        f'{m_cap_bottom}{e.hor_thick * section_width_price_of_1}'
-        f'{held_bottom}{e.hor_thick * len_held.w_pad}{held_bottom_cross}'
-        f'{e.hor_thick * section_width_value_held}{e.mid_thick.mid_thick}'
-        f'{e.hor_thick * len_perc.w_pad}{e.bot.right}'
-    )
 
-    bottom_gap = (
-        len_rank.w_pad + len_name.w_pad +
-        section_width_price_of_1 + len_held.w_pad + 4 + len_m_cap_bottom
-    )
+def add_fiat_prices(coins_json, extra_fiat_currencies, debug=False, test=False):
+    # coingecko also prices in btc, eth etc., which would give a second column for the same comparison coin
+    comp_symbols = {c.get('symbol') for c in coins_json['comparison'].values()}
+    for currency in extra_fiat_currencies:
+        if currency in comp_symbols:
+            print(f' {time.strftime("%H:%M:%S")} "{currency}" is already a comparison coin - skipping it.')
 
-    abs_bottom = (
-        f'{" " * (bottom_gap - 7)}Total: {held_ver}'
-        f'{footer_str_total}{e.ver_thick}\n '
-        f'{" " * bottom_gap}{e.bot_left if thin_held_sides else e.bot.left}'
-        f'{e.hor_thick * section_width_value_held}{e.bot.right}'
-    )
+    extra_fiat_currencies = [c for c in extra_fiat_currencies if c not in comp_symbols]
+    coins_json['extra_fiat_currencies'] = extra_fiat_currencies
 
-    print(f' {top}\n {header}\n {mid_thick}')
+    # get_coin_prices leaves them here when they came back with the main simple/price request
+    fiat_prices = coins_json.pop('fiat_prices', None)
 
-    for coin_idx, coin in enumerate(coins):
-        is_eth = True if coin.name.lower() == 'ethereum' else False
-        coin_str_m_cap = e.ver_thick
-        coin_str_m_cap_gap = e.ver_thick
+    if extra_fiat_currencies:
+        if fiat_prices is None:
+            fiat_prices = get_fiat_prices(
+                coin_ids=sorted(set(coins_json['holdings']) | set(coins_json['comparison'])),
+                currencies=extra_fiat_currencies, debug=debug, test=test
+            )
 
-        if show_market_caps:
-            coin_str_m_cap = f'{e.ver_thick}{col_pad}{coin.market_cap.formatted:>{len_m_cap.width}}{col_pad}'
-            coin_str_m_cap_gap = f'{e.ver_thick}{" " * section_width_m_cap}'
+        for group in ('holdings', 'comparison'):
+            for coin_id, coin_data in coins_json[group].items():
+                coin_data['fiat_prices'] = fiat_prices.get(coin_id, {})
 
-            if show_market_cap_percentages:
-                for idx, m_cap_perc in enumerate(coin.comp_list_m_cap_percs):
-                    coin_str_m_cap += f'{col_pad}{m_cap_perc:>{Coin.max_width_m_cap_percs[idx]}}{col_pad}'
+    return coins_json
 
-            coin_str_m_cap += e.ver_thick
-            coin_str_m_cap_gap += e.ver_thick
 
-        coin_str_price_of_1 = f'{col_pad}{coin.value_of_one.formatted:>{len_price_of_1.width}}{col_pad}'
-        for idx, price_of_1 in enumerate(coin.comp_list_prices_of_1):
-            coin_str_price_of_1 += f'{col_pad}{price_of_1:>{Coin.max_width_prices_of_1[idx]}}{col_pad}'
+def prepare_batch(fiat_currency, args, holdings_paths):
+    fiat_currency, portfolios = fetch_batch(fiat_currency=fiat_currency, args=args, holdings_paths=holdings_paths)
+
+    with span('build snapshots', portfolios=len(portfolios)):
+        return {
+            path: build_snapshot(coins_json=coins_json, fiat_currency=fiat_currency, validator_mode=args.validators)
+            for path, coins_json in portfolios.items()
+        }
 
-        coin_str_value_of_held = f'{col_pad}{coin.value_of_held.formatted:>{len_value_of_held.width}}{col_pad}'
-        for idx, value_of_held in enumerate(coin.comp_list_values_of_held):
-            coin_str_value_of_held += f'{col_pad}{value_of_held:>{Coin.max_width_values_of_held[idx]}}{col_pad}'
 
-        coin_str = (
-            f'{e.ver_thick}{col_pad}{coin.rank:>{len_rank.width-1}}){col_pad}{e.ver_thick}'
-            f'{col_pad}{coin.name:<{len_name.width}}{col_pad}{coin_str_m_cap}'
-            f'{coin_str_price_of_1}'
-            f'{held_ver}{col_pad}{coin.total_held.formatted:>{len_held.width}}{col_pad}{held_ver}'
-            f'{coin_str_value_of_held}{e.ver_thick}'
-            f'{col_pad}{coin.perc_of_total.formatted:>{len_perc.width}}{col_pad}{e.ver_thick}'
+def fetch_batch(fiat_currency, args, holdings_paths):
+    print(f'\n {time.strftime("%A - %Y/%m/%d - %X")}\n')
+
+    debug = args.debug
+    start = time.perf_counter()
+
+    if not is_valid_currency(currency=fiat_currency, debug=debug, update=args.update_coins_list):
+        print(f' {time.strftime("%H:%M:%S")} invalid currency "{fiat_currency}" specified - reverting to "USD".')
+        fiat_currency = 'USD'
+
+    with span('coin index'):
+        coin_index = get_coin_index(debug=debug, update=args.update_coins_list)
+
+    # every holdings file is matched against the same index, and each entry is only matched once
+    matches = {}
+    portfolios = {}
+    for path in holdings_paths:
+        with span('holdings', file=str(path)):
+            portfolios[path] = get_holdings(
+                debug=debug, comparison_coins=args.compare_to if args.compare_to else load_config().compare_to,
+                validator_mode=args.validators, holdings_path=path, coin_index=coin_index, matches=matches
+            )
+
+    # one price request for the coins of every portfolio, without saving their combined holdings to the history
+    shared = {'holdings': {}, 'comparison': {}}
+    for coins_json in portfolios.values():
+        for group in shared:
+            for coin_id in coins_json[group]:
+                shared[group].setdefault(coin_id, {})
+
+    extra_fiat_currencies = get_extra_fiat_currencies(fiat_currency, args)
+
+    with span('prices', coins=len(shared['holdings']) + len(shared['comparison'])):
+        get_coin_prices(
+            coins=shared, currency=fiat_currency, debug=debug, test=args.test, record_holdings=False,
+            extra_currencies=extra_fiat_currencies
         )
 
-        if is_eth and Coin.is_staking_eth and coin_idx > 0:
-            print(f' {mid_thin}')
+    with span('fiat prices'):
+        add_fiat_prices(
+            coins_json=shared, extra_fiat_currencies=extra_fiat_currencies, debug=debug, test=args.test
+        )
 
-        print(f' {coin_str}')
+    for coins_json in portfolios.values():
+        coins_json['extra_fiat_currencies'] = shared['extra_fiat_currencies']
 
-        sub_line_start = f' {e.ver_thick}{col_pad}{"":{len_rank.width}}{col_pad}{e.ver_thick}'
+        for group in ('holdings', 'comparison'):
+            for coin_id, coin_data in coins_json[group].items():
+                coin_data.update(shared[group][coin_id])
 
-        if is_eth and coin.qty_held and Coin.is_staking_eth:
-            print(f' {blank_line}')
-            eth_type_strs = {}
-            for s in [coin.qty_held, coin.qty_staked, coin.qty_earned]:
-                if s.short_str == 'TOTAL ETH':
-                    name_str = f'{s.short_str:<{len_name.width}}'
-                    perc_str = f'{coin.perc_of_total.formatted:>{len_perc.width}}'
+    validator_indexes = {path: get_validator_indexes(holdings_path=path) for path in holdings_paths}
+    all_indexes = list(dict.fromkeys(i for indexes in validator_indexes.values() for i in indexes))
 
-                else:
-                    name_str = f' - {s.short_str:<{len_name.width - 3}}'
-                    perc_str = f'{"":{len_perc.width}}'
+    if all_indexes:
+        with span('validators', validators=len(all_indexes)):
+            validators_data = get_beaconchain_data(validator_indexes=all_indexes, debug=debug, test=args.test)
 
-                if details_in_name_col:
-                    s_details_str = f'{col_pad}{name_str}{col_pad}{coin_str_m_cap_gap}{" " * section_width_price_of_1}'
+        by_index = {str(v['validatorindex']): v for v in validators_data}
+        for path, coins_json in portfolios.items():
+            if validator_indexes[path] and 'ethereum' in coins_json['holdings']:
+                coins_json['holdings']['ethereum']['validators_data'] = [
+                    by_index[i] for i in validator_indexes[path] if i in by_index
+                ]
 
-                else:
-                    s_details_str = (
-                        f'{"":{len_name.w_pad}}{coin_str_m_cap_gap}{col_pad}'
-                        f'{s.long_str:>{section_width_price_of_1-2}}{col_pad}'
-                    )
+    if debug:
+        print(
+            f' {time.strftime("%H:%M:%S")} fetched {len(portfolios)} portfolios ({len(shared["holdings"])} coins, '
+            f'{len(all_indexes)} validators) in {time.perf_counter() - start:,.3f}s'
+        )
 
-                eth_sub_str = f'{col_pad}{s.in_fiat.formatted:>{len_value_of_held.width}}{col_pad}'
+        print_host_stats()
+        print()
 
-                for idx, eth_sub in enumerate(s.comp_list_values_of_held):
-                    eth_sub_str += f'{col_pad}{eth_sub:>{Coin.max_width_values_of_held[idx]}}{col_pad}'
+    return fiat_currency, portfolios
 
-                coin_str_value_of_held = f'{col_pad}{s.in_fiat.formatted:>{len_price_of_1.width}}{col_pad}'
-                for idx, value_of_held in enumerate(coin.comp_list_prices_of_1):
-                    coin_str_value_of_held += f'{col_pad}{value_of_held:>{Coin.max_width_prices_of_1[idx]}}{col_pad}'
 
-                subtype_str = (
-                    f'{sub_line_start}{s_details_str}'
-                    f'{held_ver}{col_pad}{s.quantity.formatted:>{len_held.width}}{col_pad}{held_ver}'
-                    f'{eth_sub_str}{e.ver_thick}'
-                    f'{col_pad}{perc_str}{col_pad}{e.ver_thick}'
-                )
+def build_snapshot(coins_json, fiat_currency, validator_mode=False):
+    dp = load_config().dp
+    snapshot = PortfolioSnapshot(
+        fiat_currency=fiat_currency, extra_fiat_currencies=coins_json.get('extra_fiat_currencies', [])
+    )
 
-                eth_type_strs[s.short_str] = subtype_str
+    holdings = {
+        cj: coins_json['holdings'][cj] for cj in coins_json['holdings']
+        if coins_json['holdings'][cj].get('symbol') and coins_json['holdings'][cj].get('rank')
+    }
 
-            print(f'{eth_type_strs["Held"]}\n{eth_type_strs["Staked"]}\n{eth_type_strs["Earned"]}')
+    if not validator_mode:
+        snapshot.longest_symbol = len(max([holdings[c]['symbol'] for c in holdings], key=len))
 
-            if split_validators and len(coin.validators) > 1:
-                print(f' {blank_line}')
+    with span('comparison coins', count=len(coins_json['comparison'])):
+        snapshot.comparison_coins = sorted(
+            CoinBase(coin_data=coins_json['comparison'][c], snapshot=snapshot) for c in coins_json['comparison']
+        )
 
-                for v in coin.validators:
-                    if details_in_name_col:
-                        v_details_str = (
-                            f'{col_pad}  - {v.index:<{len_name.width - 4}}{col_pad}{coin_str_m_cap_gap}'
-                            f'{" " * section_width_price_of_1}'
-                        )
+    with span('coins', count=len(holdings)):
+        coins = [Coin(coin_data=holdings[c], snapshot=snapshot) for c in holdings]
 
-                    else:
-                        v_details_str = (
-                            f'{"":{len_name.w_pad}}{coin_str_m_cap_gap}{col_pad}{v.val_str:>{section_width_price_of_1-2}}{col_pad}'
-                        )
+    snapshot.total_held_in_fiat = Quantity(
+        raw=sum([c.value_of_held.raw for c in coins]), dec_places=dp.fiat_total, currency=snapshot.fiat_currency
+    )
+    # a total that's missing a coin's value would be understated, so it's left blank instead
+    snapshot.extra_fiat_totals = [
+        blank_quantity
+        if any(c.extra_fiat_values_of_one[c_idx] is None and c.total_held.raw for c in coins)
+        else Quantity(
+            raw=sum(c.extra_fiat_values_of_held[c_idx].raw for c in coins), dec_places=dp.fiat_total, currency=currency
+        )
+        for c_idx, currency in enumerate(snapshot.extra_fiat_currencies)
+    ]
 
-                    val_str = f'{col_pad}{v.earned.in_fiat.formatted:>{len_value_of_held.width}}{col_pad}'
+    for coin in coins:
+        perc_of_total = (coin.value_of_held.raw / snapshot.total_held_in_fiat.raw) * 100
+        coin.perc_of_total = Quantity(raw=perc_of_total, currency='%', dec_places=dp.percent)
 
-                    for idx, val_earned in enumerate(v.earned.comp_list_values_of_held):
-                        val_str += f'{col_pad}{val_earned:>{Coin.max_width_values_of_held[idx]}}{col_pad}'
+    with span('valuation'):
+        Valuation(snapshot=snapshot).apply(coins)
 
-                    print(
-                        f'{sub_line_start}{v_details_str}'
-                        f'{held_ver}{col_pad}{v.earned.quantity.formatted:>{len_held.width}}{col_pad}{held_ver}'
-                        f'{val_str}'
-                        f'{e.ver_thick}'
-                        f'{col_pad}{" " * len_perc.width}{col_pad}{e.ver_thick}'
-                    )
+    snapshot.coins = sorted(coins)
 
-            if coin_idx + 1 < len(coins) and Coin.is_staking_eth:
-                print(f' {mid_thin}')
+    return snapshot
 
-    print(f' {bottom}\n {abs_bottom}\n')
 
+def display_data(snapshot: PortfolioSnapshot, page=None, limit=None):
+    config = load_config()
+    coins = snapshot.coins
+    thin_held_sides = False
+    show_m_cap_percs = config.show_market_caps and config.show_market_cap_percentages
+    comp_symbols = [c.symbol for c in snapshot.comparison_coins]
+    extra_fiat = snapshot.extra_fiat_currencies
+
+    sections = [
+        TableSection('rank', [TableCol(header_align='<')]),
+        TableSection('name', [TableCol(width=9 if snapshot.is_staking_eth else 0, align='<')])
+    ]
+    header = ['Rank', 'Name']
+
+    if config.show_market_caps:
+        sections.append(
+            TableSection('m_cap', [TableCol(header_align='^')] + [TableCol() for _ in comp_symbols if show_m_cap_percs])
+        )
+        header += ['Market cap'] + [f'% of {s}' for s in comp_symbols if show_m_cap_percs]
+
+    sections += [
+        TableSection('price', [TableCol(header_align='^')] + [TableCol() for _ in comp_symbols]),
+        TableSection('held', [TableCol(header_align='^')], thick=not thin_held_sides),
+        TableSection(
+            'value', [TableCol(header_align='^')] + [TableCol() for _ in extra_fiat + comp_symbols],
+            thick=not thin_held_sides
+        ),
+        TableSection('perc', [TableCol()])
+    ]
+    header += (
+        ['Price of 1'] + [f'in {s}' for s in comp_symbols] +
+        ['Held'] + ['Value held'] + [f'in {s}' for s in extra_fiat + comp_symbols]
+    )
 
-def display_validators(validators: List[Validator]):
-    col_pad = " " * column_pad
-    e = Elements()
+    rows = []
+    for coin in coins:
+        cells = [f'{coin.rank})', coin.name]
 
-    staked_in_eth_total = Quantity(
-        raw=sum([v.staked.quantity.raw for v in validators]), dec_places=dp.fiat, currency='ETH'
-    ).formatted
+        if config.show_market_caps:
+            cells.append(coin.market_cap.formatted)
 
-    staked_in_fiat_total = Quantity(
-        raw=sum([v.staked.in_fiat.raw for v in validators]), dec_places=dp.fiat, currency=Coin.fiat_currency
-    ).formatted
+            if show_m_cap_percs:
+                cells += [x.formatted for x in coin.comp_list_m_cap_percs]
 
-    earned_in_eth_total = Quantity(
-        raw=sum([v.earned.quantity.raw for v in validators]), dec_places=dp.fiat, currency='ETH'
-    ).formatted
+        cells += [coin.value_of_one.formatted] + [x.formatted for x in coin.comp_list_prices_of_1]
+        cells += [coin.total_held.formatted, coin.value_of_held.formatted]
+        cells += [x.formatted for x in coin.extra_fiat_values_of_held + coin.comp_list_values_of_held]
+        cells.append(coin.perc_of_total.formatted)
+        rows.append(cells)
 
-    earned_in_fiat_total = Quantity(
-        raw=sum([v.earned.in_fiat.raw for v in validators]), dec_places=dp.fiat, currency=Coin.fiat_currency
-    ).formatted
+    total = [snapshot.total_held_in_fiat.formatted]
+    total += [x.formatted for x in snapshot.extra_fiat_totals + snapshot.comp_list_total_values]
 
-    _total_eth = sum([v.total.quantity.raw for v in validators])
+    layout = TableLayout(sections=sections)
+    layout.fit([header] + rows)
+    layout.fit([total], start='value')
 
-    total_in_eth_total = Quantity(
-        raw=_total_eth, dec_places=dp.fiat, currency='ETH'
-    ).formatted
+    for coin in coins:
+        if coin.name.lower() == 'ethereum' and config.split_validators and coin.validators and details_in_name_col:
+            layout.fit([[f'  - {index}'] for index in coin.validators.indexes], start='name')
 
-    total_in_fiat_total = Quantity(
-        raw=sum([v.total.in_fiat.raw for v in validators]), dec_places=dp.fiat, currency=Coin.fiat_currency
-    ).formatted
+    e = layout.e
+    coin_row = layout.template()
+    sub_row = layout.template(merge=('m_cap', 'price'))
+    m_cap_gap = [''] if config.show_market_caps else []
+    mid_thin = layout.rule(e.mid_thin, e.hor_thin)
+    blank_line = layout.blank()
 
-    len_rank = TableCol(width=max(3, len(str(len(validators))))+1)
-    len_index = TableCol(width=max(5, len(max([v.index for v in validators], key=len))))
-    len_staked_eth = TableCol(width=len(staked_in_eth_total))
-    len_staked_fiat = TableCol(width=len(staked_in_fiat_total))
-    len_earned_eth = TableCol(width=len(earned_in_eth_total))
-    len_earned_fiat = TableCol(width=len(earned_in_fiat_total))
-    len_total_eth = TableCol(width=len(total_in_eth_total))
-    len_total_fiat = TableCol(width=len(total_in_fiat_total))
+    def sub_line(name_str, long_str, s):
+        details = [name_str] + m_cap_gap + [''] if details_in_name_col else [''] + m_cap_gap + [long_str]
+        cells = [''] + details + [s.quantity.formatted, s.in_fiat.formatted]
+        cells += [x.formatted for x in s.extra_fiat_values_of_held + s.comp_list_values_of_held] + ['']
 
-    for validator in validators:
-        perc = (validator.total.quantity.raw / _total_eth) * 100
-        validator.percentage = Quantity(raw=perc, currency='%', dec_places=dp.percent)
+        return f' {sub_row.format(*cells)}'
 
-    len_percentage = TableCol(width=len(max([v.percentage.formatted for v in validators], key=len)))
+    def table_lines():
+        yield f' {layout.rule(e.top, e.hor_thick, stop="perc")}'
+        yield f' {layout.template(stop="perc", header=True).format(*header)}'
+        yield f' {layout.rule(e.mid_thick, e.hor_thick, right=e.top.right)}'
 
-    section_width_staked = len_staked_eth.w_pad + len_staked_fiat.w_pad
-    section_width_earned = len_earned_eth.w_pad + len_earned_fiat.w_pad
-    section_width_total = len_total_eth.w_pad + len_total_fiat.w_pad
+        for coin_idx, (coin, cells) in enumerate(zip(coins, rows)):
+            is_eth = True if coin.name.lower() == 'ethereum' else False
 
-    staked_header_str = (
-        f'{col_pad}{"STAKED":>{len_staked_eth.width}}{col_pad}'
-        f'{col_pad}{f"in {Coin.fiat_currency}":>{len_staked_fiat.width}}{col_pad}'
-    )
+            if is_eth and snapshot.is_staking_eth and coin_idx > 0:
+                yield f' {mid_thin}'
 
-    earned_header_str = (
-        f'{col_pad}{"EARNED":>{len_earned_eth.width}}{col_pad}'
-        f'{col_pad}{f"in {Coin.fiat_currency}":>{len_earned_fiat.width}}{col_pad}'
-    )
+            yield f' {coin_row.format(*cells)}'
 
-    total_header_str = (
-        f'{col_pad}{"TOTAL":>{len_total_eth.width}}{col_pad}'
-        f'{col_pad}{f"in {Coin.fiat_currency}":>{len_total_fiat.width}}{col_pad}'
-    )
+            if is_eth and coin.qty_held and snapshot.is_staking_eth:
+                yield f' {blank_line}'
 
-    staked_total_str = (
-        f'{col_pad}{staked_in_eth_total:>{len_staked_eth.width}}{col_pad}'
-        f'{col_pad}{staked_in_fiat_total:>{len_staked_fiat.width}}{col_pad}'
-    )
+                for s in [coin.qty_held, coin.qty_staked, coin.qty_earned]:
+                    yield sub_line(f' - {s.short_str}', s.long_str, s)
 
-    earned_total_str = (
-        f'{col_pad}{earned_in_eth_total:>{len_earned_eth.width}}{col_pad}'
-        f'{col_pad}{earned_in_fiat_total:>{len_earned_fiat.width}}{col_pad}'
-    )
+                if config.split_validators and coin.validators and len(coin.validators) > 1:
+                    yield f' {blank_line}'
 
-    total_total_str = (
-        f'{col_pad}{total_in_eth_total:>{len_total_eth.width}}{col_pad}'
-        f'{col_pad}{total_in_fiat_total:>{len_total_fiat.width}}{col_pad}'
-    )
+                    for v_idx in page_rows(len(coin.validators), page, limit):
+                        v = coin.validators[v_idx]
+                        yield sub_line(f'  - {v.index}', v.val_str, v.earned)
 
-    for idx, comp_coin in enumerate(Coin.comparison_coins):
-        header_str = f'in {comp_coin.symbol}'
+                if coin_idx + 1 < len(coins) and snapshot.is_staking_eth:
+                    yield f' {mid_thin}'
 
-        staked_width = Coin.max_width_vals_staked[idx]
-        earned_width = Coin.max_width_vals_earned[idx]
-        total_width = Coin.max_width_vals_total[idx]
+        yield f' {layout.rule(e.bot, e.hor_thick, joints={"value": e.mid_thick, "perc": e.mid_thick})}'
+        total_left = e.bot_left if thin_held_sides else None
 
-        section_width_staked += staked_width + (2 * column_pad)
-        section_width_earned += earned_width + (2 * column_pad)
-        section_width_total += total_width + (2 * column_pad)
+        yield f' {"Total: ":>{layout.offset("value")}}{layout.template(start="value", stop="perc").format(*total)}'
+        yield (
+            f' {" " * layout.offset("value")}'
+            f'{layout.rule(e.bot, e.hor_thick, start="value", stop="perc", left=total_left)}'
+        )
+        yield ''
 
-        staked_header_str += f'{col_pad}{header_str:>{staked_width}}{col_pad}'
-        staked_total_str += f'{col_pad}{Coin.comp_list_vals_staked[idx]:>{staked_width}}{col_pad}'
+    write_lines(table_lines())
 
-        earned_header_str += f'{col_pad}{header_str:>{earned_width}}{col_pad}'
-        earned_total_str += f'{col_pad}{Coin.comp_list_vals_earned[idx]:>{earned_width}}{col_pad}'
 
-        total_header_str += f'{col_pad}{header_str:>{total_width}}{col_pad}'
-        total_total_str += f'{col_pad}{Coin.comp_list_vals_total[idx]:>{total_width}}{col_pad}'
+def page_rows(count, page=None, limit=None):
+    if page and not limit:
+        limit = validators_per_page
 
-    top = (
-        f'{e.top.left}'
-        f'{e.hor_thick * len_rank.w_pad}{e.top.mid_thick}'
-        f'{e.hor_thick * len_index.w_pad}{e.top.mid_thick}'
-        f'{e.hor_thick * section_width_staked}{e.top.mid_thin}'
-        f'{e.hor_thick * section_width_earned}{e.top.mid_thin}'
-        f'{e.hor_thick * section_width_total}'
-        f'{e.top.right}'
-    )
+    if not limit:
+        return range(count)
 
-    header = (
-        f'{e.ver_thick}{col_pad}Rank{col_pad}{e.ver_thick}{col_pad}{"Index":<{len_index.width}}{col_pad}{e.ver_thick}'
-        f'{staked_header_str}{e.ver_thin}{earned_header_str}{e.ver_thin}{total_header_str}'
-        f'{e.ver_thick}'
-    )
+    last_page = max(-(-count // limit), 1)
+    start = (min(max(page or 1, 1), last_page) - 1) * limit
 
-    body_top = (
-        f'{e.mid_thick.left}'
-        f'{e.hor_thick * len_rank.w_pad}{e.mid_thick.mid_thick}'
-        f'{e.hor_thick * len_index.w_pad}{e.mid_thick.mid_thick}'
-        f'{e.hor_thick * section_width_staked}{e.mid_thick.mid_thin}'
-        f'{e.hor_thick * section_width_earned}{e.mid_thick.mid_thin}'
-        f'{e.hor_thick * section_width_total}{e.mid_thick.mid_thick}'
-        f'{e.hor_thick * len_percentage.w_pad}{e.top.right}'
-    )
+    return range(start, min(start + limit, count))
 
-    body_bottom = (
-        f'{e.bot.left}{e.hor_thick * len_rank.w_pad}'
-        f'{e.bot.mid_thick}{e.hor_thick * len_index.w_pad}'
-        f'{e.mid_thick.mid_thick}{e.hor_thick * section_width_staked}'
-        f'{e.mid_thick.mid_thin}{e.hor_thick * section_width_earned}'
-        f'{e.mid_thick.mid_thin}{e.hor_thick * section_width_total}'
-        f'{e.mid_thick.mid_thick}{e.hor_thick * len_percentage.w_pad}{e.bot.right}'
-    )
 
-    total_pad = len_rank.w_pad + len_index.w_pad + 2
+def write_lines(lines):
+    while True:
+        chunk = list(islice(lines, render_chunk_lines))
+        if not chunk:
+            break
 
-    total_total_line = (
-        f'{"Total: ":>{total_pad}}{e.ver_thick}'
-        f'{staked_total_str}{e.ver_thin}{earned_total_str}{e.ver_thin}{total_total_str}{e.ver_thick}'
-    )
+        sys.stdout.write('\n'.join(chunk) + '\n')
 
-    bottom = (
-        f'{" " * total_pad}{e.bot.left}'
-        f'{e.hor_thick * section_width_staked}{e.bot.mid_thin}'
-        f'{e.hor_thick * section_width_earned}{e.bot.mid_thin}'
-        f'{e.hor_thick * section_width_total}{e.bot.right}'
-    )
+    sys.stdout.flush()
 
-    print(f' {top}\n {header}\n {body_top}')
 
-    for v_idx, val in enumerate(validators):
-        staked_line = (
-            f'{col_pad}{val.staked.quantity.formatted:>{len_staked_eth.width}}{col_pad}'
-            f'{col_pad}{val.staked.in_fiat.formatted:>{len_staked_fiat.width}}{col_pad}'
-        )
+def display_validators(snapshot: PortfolioSnapshot, validators: ValidatorStore, page=None, limit=None):
+    dp = load_config().dp
+    comp_symbols = [c.symbol for c in snapshot.comparison_coins]
+    percentages = validators.percentages()
 
-        earned_line = (
-            f'{col_pad}{val.earned.quantity.formatted:>{len_earned_eth.width}}{col_pad}'
-            f'{col_pad}{val.earned.in_fiat.formatted:>{len_earned_fiat.width}}{col_pad}'
-        )
+    sections = [
+        TableSection('rank', [TableCol(header_align='<')]),
+        TableSection('index', [TableCol(header_align='<')])
+    ]
+    header = ['Rank', 'Index']
+    total = []
 
-        total_line = (
-            f'{col_pad}{val.total.quantity.formatted:>{len_total_eth.width}}{col_pad}'
-            f'{col_pad}{val.total.in_fiat.formatted:>{len_total_fiat.width}}{col_pad}'
+    extra_fiat = snapshot.extra_fiat_currencies
+
+    for name, comp_list, thick in (
+        ('staked', snapshot.comp_list_vals_staked, True),
+        ('earned', snapshot.comp_list_vals_earned, False),
+        ('total', snapshot.comp_list_vals_total, False)
+    ):
+        column = getattr(validators, name)
+        sections.append(
+            TableSection(name, [TableCol(), TableCol()] + [TableCol() for _ in extra_fiat + comp_symbols], thick=thick)
+        )
+        header += [name.upper(), f'in {snapshot.fiat_currency}'] + [f'in {s}' for s in extra_fiat + comp_symbols]
+        total += [
+            Quantity(raw=sum(column), dec_places=dp.fiat, currency='ETH').formatted,
+            Quantity(raw=sum(validators.in_fiat(column)), dec_places=dp.fiat, currency=snapshot.fiat_currency).formatted
+        ] + [
+            '' if value_of_one is None else
+            Quantity(raw=sum(column) * value_of_one, dec_places=dp.fiat, currency=currency).formatted
+            for currency, value_of_one in zip(extra_fiat, validators.extra_fiat_values_of_one)
+        ] + [x.formatted for x in comp_list]
+
+    sections.append(TableSection('perc', [TableCol()]))
+
+    # the widest cells come from the totals and from aggregates, so no row is formatted before rendering starts
+    layout = TableLayout(sections=sections)
+    layout.fit([header, [f'{len(validators)})', max(validators.indexes, key=len)]])
+    layout.fit([total], start='staked')
+    layout.fit([[Quantity(raw=max(percentages), currency='%', dec_places=dp.percent).formatted]], start='perc')
+
+    e = layout.e
+    validator_row = layout.template()
+    shown = page_rows(len(validators), page, limit)
+
+    def table_lines():
+        yield f' {layout.rule(e.top, e.hor_thick, stop="perc")}'
+        yield f' {layout.template(stop="perc", header=True).format(*header)}'
+        yield f' {layout.rule(e.mid_thick, e.hor_thick, right=e.top.right)}'
+
+        for v_idx in shown:
+            val = validators[v_idx]
+            cells = [f'{v_idx + 1})', val.index]
+
+            for s in (val.staked, val.earned, val.total):
+                cells += [s.quantity.formatted, s.in_fiat.formatted] + [
+                    x.formatted for x in s.extra_fiat_values_of_held + s.comp_list_values_of_held
+                ]
+
+            cells.append(Quantity(raw=percentages[v_idx], currency='%', dec_places=dp.percent).formatted)
+
+            yield f' {validator_row.format(*cells)}'
+
+        yield f' {layout.rule(e.bot, e.hor_thick, joints={s.name: e.mid_thick for s in sections[2:]})}'
+        yield f' {"Total: ":>{layout.offset("staked")}}{layout.template(start="staked", stop="perc").format(*total)}'
+        yield f' {" " * layout.offset("staked")}{layout.rule(e.bot, e.hor_thick, start="staked", stop="perc")}'
+        yield ''
+
+    write_lines(table_lines())
+
+    if len(shown) < len(validators):
+        page_size = limit or validators_per_page
+        print(
+            f' showing validators {shown.start + 1}-{shown.stop} of {len(validators)} '
+            f'(page {shown.start // page_size + 1} of {-(-len(validators) // page_size)})\n'
         )
 
-        for c_idx, comp in enumerate(Coin.comparison_coins):
-            staked_line += f'{col_pad}{val.comp_list_staked_eth[c_idx]:>{Coin.max_width_vals_staked[c_idx]}}{col_pad}'
-            earned_line += f'{col_pad}{val.comp_list_earned_eth[c_idx]:>{Coin.max_width_vals_earned[c_idx]}}{col_pad}'
-            total_line += f'{col_pad}{val.comp_list_total_eth[c_idx]:>{Coin.max_width_vals_total[c_idx]}}{col_pad}'
-
-        validator_line = (
-            f'{e.ver_thick}{col_pad}{v_idx+1:>{len_rank.width-1}}){col_pad}'
-            f'{e.ver_thick}{col_pad}{val.index:>{len_index.width}}{col_pad}'
-            f'{e.ver_thick}{staked_line}{e.ver_thin}{earned_line}{e.ver_thin}{total_line}{e.ver_thick}'
-            f'{col_pad}{val.percentage.formatted:>{len_percentage.width}}{col_pad}'
-            f'{e.ver_thick}'
+
+def _change(then, now):
+    return f'{(now - then) / then * 100:+,.{load_config().dp.percent}f} %' if then else ''
+
+
+def display_history(fiat_currency, period):
+    dp = load_config().dp
+    print(f'\n {time.strftime("%A - %Y/%m/%d - %X")}\n')
+
+    history = History.open() if history_db_file.is_file() else None
+    first = history.first_timestamp(fiat_currency) if history else None
+
+    if first is None:
+        print(f' no {fiat_currency} price history recorded yet ("{history_db_file}")\n')
+        return
+
+    now = time.time()
+    then = max(now - period, first)
+
+    prices = {'then': history.prices_at(fiat_currency, then), 'now': history.prices_at(fiat_currency, now)}
+    held = {'then': history.holdings_at(then), 'now': history.holdings_at(now)}
+
+    validator_indexes = get_validator_indexes()
+    staked = {
+        when: sum(balances.get(v, 0) for v in validator_indexes) / gwei_per_eth
+        for when, balances in (('then', history.validators_at(then)), ('now', history.validators_at(now)))
+    }
+
+    coin_ids = sorted(
+        [c for c in prices['now'] if c in held['now'] or c in held['then']],
+        key=lambda c: (prices['now'][c][1] is None, prices['now'][c][1])
+    )
+
+    rows = []
+    totals = {'then': 0, 'now': 0}
+    for coin_id in coin_ids:
+        symbol = prices['now'][coin_id][0]
+        price = {when: prices[when][coin_id][2] if coin_id in prices[when] else 0 for when in totals}
+        qty = {when: held[when].get(coin_id, 0) + (staked[when] if coin_id == 'ethereum' else 0) for when in totals}
+        value = {when: qty[when] * price[when] for when in totals}
+
+        for when in totals:
+            totals[when] += value[when]
+
+        rows.append(
+            [symbol] +
+            [Quantity(raw=price[when], currency=fiat_currency, dec_places=dp.fiat).formatted for when in totals] +
+            [_change(price['then'], price['now'])] +
+            [Quantity(raw=qty[when], currency=symbol, dec_places=dp.crypto).formatted for when in totals] +
+            [Quantity(raw=value[when], currency=fiat_currency, dec_places=dp.fiat_total).formatted for when in totals] +
+            [_change(value['then'], value['now'])]
         )
 
-        print(f' {validator_line}')
+    total = ['Total', '', '', '', '', ''] + [
+        Quantity(raw=totals[when], currency=fiat_currency, dec_places=dp.fiat_total).formatted for when in totals
+    ] + [_change(totals['then'], totals['now'])]
+
+    header = ['Coin', 'Price then', 'Price now', 'Change', 'Held then', 'Held now', 'Value then', 'Value now', 'Change']
+
+    layout = TableLayout(sections=[
+        TableSection('coin', [TableCol(align='<')]),
+        TableSection('price', [TableCol(), TableCol(), TableCol()]),
+        TableSection('held', [TableCol(), TableCol()]),
+        TableSection('value', [TableCol(), TableCol(), TableCol()])
+    ])
+    layout.fit([header, total] + rows)
+
+    e = layout.e
+    row_template = layout.template()
+    timestamps = {when: max(p[3] for p in prices[when].values()) for when in totals}
+
+    print(
+        f' {time.strftime("%Y/%m/%d %X", time.localtime(timestamps["then"]))} -> '
+        f'{time.strftime("%Y/%m/%d %X", time.localtime(timestamps["now"]))}\n'
+    )
+
+    def table_lines():
+        yield f' {layout.rule(e.top, e.hor_thick)}'
+        yield f' {layout.template(header=True).format(*header)}'
+        yield f' {layout.rule(e.mid_thick, e.hor_thick)}'
+
+        for cells in rows:
+            yield f' {row_template.format(*cells)}'
+
+        yield f' {layout.rule(e.mid_thin, e.hor_thin)}'
+        yield f' {row_template.format(*total)}'
+        yield f' {layout.rule(e.bot, e.hor_thick)}'
+
+        if validator_indexes:
+            yield (
+                f' validators: {staked["then"]:,.{dp.crypto}f} ETH -> {staked["now"]:,.{dp.crypto}f} ETH '
+                f'({staked["now"] - staked["then"]:+,.{dp.crypto}f} ETH)'
+            )
+
+        yield ''
 
-    print(f' {body_bottom}\n {total_total_line}\n {bottom}\n')
+    write_lines(table_lines())
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+import sqlite3
+import time
+
+from c_constants import history_db_file
+
+spans = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60, 'w': 7 * 24 * 60 * 60}
+
+
+def parse_span(text):
+    text = text.strip().lower()
+
+    if text[-1:] in spans:
+        return float(text[:-1]) * spans[text[-1]]
+
+    return float(text)
+
+
+@dataclass
+class History:
+    connection: sqlite3.Connection
+
+    @classmethod
+    def open(cls, db_file=history_db_file):
+        db = sqlite3.connect(str(db_file))
+        db.executescript(
+            'CREATE TABLE IF NOT EXISTS prices ('
+            '  coin TEXT, timestamp INTEGER, currency TEXT, symbol TEXT, rank INTEGER, price REAL, market_cap REAL'
+            ');'
+            'CREATE TABLE IF NOT EXISTS holdings (coin TEXT, timestamp INTEGER, held REAL);'
+            'CREATE TABLE IF NOT EXISTS validators (validator TEXT, timestamp INTEGER, balance INTEGER);'
+            'CREATE INDEX IF NOT EXISTS prices_coin_timestamp ON prices (coin, timestamp);'
+            'CREATE INDEX IF NOT EXISTS holdings_coin_timestamp ON holdings (coin, timestamp);'
+            'CREATE INDEX IF NOT EXISTS validators_validator_timestamp ON validators (validator, timestamp);'
+        )
+
+        return cls(connection=db)
+
+    def add_prices(self, price_data, currency, timestamp):
+        self.connection.executemany(
+            'INSERT INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (
+                (
+                    c['id'], timestamp, currency.lower(), c['symbol'].upper(), c['market_cap_rank'],
+                    c['current_price'], c['market_cap']
+                )
+                for c in price_data
+            )
+        )
+
+    def add_holdings(self, holdings, timestamp):
+        self.connection.executemany(
+            'INSERT INTO holdings VALUES (?, ?, ?)',
+            (
+                (coin_id, timestamp, h.get('held') or 0)
+                for coin_id, h in holdings.items() if not h.get('comparison_only')
+            )
+        )
+
+    def add_validators(self, bc_data, timestamp):
+        self.connection.executemany(
+            'INSERT INTO validators VALUES (?, ?, ?)',
+            ((str(v['validatorindex']), timestamp, v['balance']) for v in bc_data)
+        )
+
+    def _at(self, table, key, columns, timestamp, currency=None):
+        # the latest row for each key at or before timestamp, looked up through the (key, timestamp) index
+        currency_sql = 'AND currency = ? ' if currency else ''
+        params = (currency.lower(), timestamp) if currency else (timestamp,)
+
+        rows = self.connection.execute(
+            f'SELECT t.{key}, {", ".join(f"t.{c}" for c in columns)} FROM (SELECT DISTINCT {key} FROM {table}) k '
+            f'JOIN {table} t ON t.rowid = ('
+            f'  SELECT rowid FROM {table} WHERE {key} = k.{key} {currency_sql}AND timestamp <= ? '
+            f'  ORDER BY timestamp DESC LIMIT 1'
+            f')',
+            params
+        )
+
+        return {r[0]: r[1:] for r in rows}
+
+    def prices_at(self, currency, timestamp):
+        return self._at('prices', 'coin', ('symbol', 'rank', 'price', 'timestamp'), timestamp, currency=currency)
+
+    def holdings_at(self, timestamp):
+        return {coin: held for coin, (held,) in self._at('holdings', 'coin', ('held',), timestamp).items()}
+
+    def validators_at(self, timestamp):
+        return {v: balance for v, (balance,) in self._at('validators', 'validator', ('balance',), timestamp).items()}
+
+    def first_timestamp(self, currency):
+        return self.connection.execute(
+            'SELECT MIN(timestamp) FROM prices WHERE currency = ?', (currency.lower(),)
+        ).fetchone()[0]
+
+
+def record_history(price_data=None, currency=None, holdings=None, bc_data=None, debug=False):
+    if debug:
+        start = time.perf_counter()
+        print(f' {time.strftime("%H:%M:%S")} adding to history ("{history_db_file}")... ', end='', flush=True)
+
+    timestamp = int(time.time())
+
+    try:
+        history = History.open()
+
+        with history.connection:
+            if price_data:
+                history.add_prices(price_data, currency, timestamp)
+
+            if holdings:
+                history.add_holdings(holdings, timestamp)
+
+            if bc_data:
+                history.add_validators(bc_data, timestamp)
+
+        history.connection.close()
+
+    except sqlite3.Error as e:
+        print(f' {time.strftime("%H:%M:%S")} couldn\'t add to history ("{history_db_file}"): {e}')
+        return
+
+    if debug:
+        print(f'done ({time.perf_counter() - start:,.3f}s)')
@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+from typing import Dict
+import threading
+import time
+
+from c_constants import (
+    request_timeout, http_retries, http_backoff, http_max_backoff, http_pool_size
+)
+from c_profile import span
+
+retry_statuses = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+host_stats: Dict[str, HostStats] = {}
+
+_lock = threading.Lock()
+_session = None
+
+
+def get_session():
+    global _session
+
+    # requests takes longer to import than the rest of the app, so only runs that go online pay for it
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=http_pool_size, pool_maxsize=http_pool_size)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+
+    return _session
+
+
+def _retry_after(response):
+    if response is None or 'Retry-After' not in response.headers:
+        return None
+
+    retry_after = response.headers['Retry-After']
+
+    try:
+        delay = float(retry_after)
+
+    except ValueError:
+        try:
+            from email.utils import parsedate_to_datetime
+            delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+
+        except (TypeError, ValueError):
+            return None
+
+    return min(max(delay, 0), http_max_backoff)
+
+
+def _get(url, params, headers, decode_json):
+    import requests
+
+    with span('http get', url=url) as attrs:
+        host = urlsplit(url).netloc
+
+        with _lock:
+            stats = host_stats.setdefault(host, HostStats())
+
+        response = None
+        data = None
+        for attempt in range(http_retries + 1):
+            start = time.perf_counter()
+
+            try:
+                response = get_session().get(url, params=params or {}, headers=headers, timeout=request_timeout)
+
+            except requests.exceptions.RequestException:
+                response = None
+
+            with _lock:
+                stats.requests += 1
+                stats.seconds += time.perf_counter() - start
+                stats.bytes += len(response.content) if response is not None else 0
+
+            attrs['attempts'] = attempt + 1
+            attrs['status'] = response.status_code if response is not None else None
+            attrs['bytes'] = len(response.content) if response is not None else 0
+
+            # a 200 whose body doesn't decode (cut off mid-transfer, an html error page) is retried like a 5xx
+            malformed = False
+            if decode_json and response is not None and response.status_code == 200:
+                try:
+                    with span('json decode', bytes=len(response.content)):
+                        data = response.json()
+
+                except ValueError:
+                    data = None
+                    malformed = True
+
+            if response is not None and response.status_code not in retry_statuses and not malformed:
+                return response, data
+
+            if attempt < http_retries:
+                # back off exponentially unless the server told us how long to wait
+                delay = _retry_after(response)
+                time.sleep(delay if delay is not None else min(http_backoff * 2 ** attempt, http_max_backoff))
+
+                with _lock:
+                    stats.retries += 1
+
+        with _lock:
+            stats.failures += 1
+
+        return response, data
+
+
+def get(url, params=None, headers=None):
+    return _get(url, params, headers, decode_json=False)[0]
+
+
+def get_with_json(url, params=None, headers=None):
+    return _get(url, params, headers, decode_json=True)
+
+
+def get_json(url, params=None, headers=None):
+    return get_with_json(url, params=params, headers=headers)[1]
+
+
+def print_host_stats():
+    for host, stats in host_stats.items():
+        print(
+            f' {time.strftime("%H:%M:%S")} {host}: {stats.requests} requests, {stats.retries} retries, '
+            f'{stats.failures} failures, {stats.bytes / 1024:,.1f} KB in {stats.seconds:,.3f}s'
+        )
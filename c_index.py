@@ -0,0 +1,229 @@
+from contextlib import closing
+from dataclasses import dataclass
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import resource
+
+except ImportError:
+    resource = None
+
+from c_api import get_coins_list
+from c_constants import coins_list_json_file, coins_list_db_file
+
+ngram_len = 3
+
+
+def _ngrams(text):
+    return {text[i:i + ngram_len] for i in range(len(text) - ngram_len + 1)}
+
+
+def _rss_str():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+
+        return f'{pages * resource.getpagesize() / 1048576:,.1f} MB'
+
+    except (OSError, AttributeError):
+        pass
+
+    if resource:
+        return f'{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.1f} MB peak'
+
+    return 'n/a'
+
+
+@dataclass
+class CoinIndex:
+    connection: sqlite3.Connection
+
+    @classmethod
+    def build(cls, coins_list, db_file):
+        # overlapping runs can rebuild the index at the same time, so each one builds its own file and swaps it in
+        tmp_file = db_file.with_name(f'{db_file.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+        try:
+            with closing(sqlite3.connect(str(tmp_file))) as db:
+                db.executescript(
+                    'CREATE TABLE coins ('
+                    '  pos INTEGER PRIMARY KEY, id TEXT, symbol TEXT, name TEXT,'
+                    '  id_lc TEXT, symbol_lc TEXT, name_lc TEXT, list_pos INTEGER'
+                    ');'
+                    'CREATE TABLE grams (gram TEXT, pos INTEGER, PRIMARY KEY (gram, pos)) WITHOUT ROWID;'
+                )
+
+                cls(connection=db)._insert_coins(enumerate(coins_list))
+
+                db.executescript(
+                    'CREATE INDEX coins_id_lc ON coins (id_lc);'
+                    'CREATE INDEX coins_symbol_lc ON coins (symbol_lc);'
+                    'CREATE INDEX coins_name_lc ON coins (name_lc);'
+                )
+                db.commit()
+
+            tmp_file.replace(db_file)
+
+        finally:
+            if tmp_file.is_file():
+                tmp_file.unlink()
+
+        return cls.open(db_file)
+
+    @classmethod
+    def open(cls, db_file):
+        db = sqlite3.connect(str(db_file))
+        db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+        # caches built before list_pos was added were still in coins list order by pos
+        if 'list_pos' not in [r[1] for r in db.execute('PRAGMA table_info(coins)')]:
+            db.executescript('ALTER TABLE coins ADD COLUMN list_pos INTEGER; UPDATE coins SET list_pos = pos;')
+
+        return cls(connection=db)
+
+    def _insert_coins(self, positioned_coins):
+        # pos only ties the grams to a coin, list_pos is where the coin is in the coins list and decides the order
+        for list_pos, c in positioned_coins:
+            cursor = self.connection.execute(
+                'INSERT INTO coins VALUES (NULL, ?, ?, ?, ?, ?, ?, ?)',
+                (c['id'], c['symbol'], c['name'], c['id'].lower(), c['symbol'].lower(), c['name'].lower(), list_pos)
+            )
+
+            self.connection.executemany(
+                'INSERT INTO grams VALUES (?, ?)',
+                (
+                    (gram, cursor.lastrowid)
+                    for gram in _ngrams(c['id'].lower()) | _ngrams(c['symbol'].lower()) | _ngrams(c['name'].lower())
+                )
+            )
+
+    def apply_changes(self, coins_list):
+        rows = self.connection.execute('SELECT id, symbol, name, pos, list_pos FROM coins')
+        current = {r[0]: (r[1], r[2], r[3], r[4]) for r in rows}
+        new = {c['id']: (c['symbol'], c['name']) for c in coins_list}
+
+        removed = [(v[2],) for k, v in current.items() if new.get(k) != v[:2]]
+        added = [(i, c) for i, c in enumerate(coins_list) if current.get(c['id'], (None, None))[:2] != new[c['id']]]
+
+        # coins that didn't change still shift when others are added or removed before them
+        moved = [
+            (i, current[c['id']][2]) for i, c in enumerate(coins_list)
+            if current.get(c['id'], (None, None))[:2] == new[c['id']] and current[c['id']][3] != i
+        ]
+
+        self.connection.executemany('DELETE FROM coins WHERE pos = ?', removed)
+        self.connection.executemany('DELETE FROM grams WHERE pos = ?', removed)
+        self.connection.executemany('UPDATE coins SET list_pos = ? WHERE pos = ?', moved)
+        self._insert_coins(added)
+        self.connection.commit()
+
+        return len(added), len(removed)
+
+    def get_cache_headers(self):
+        return dict(self.connection.execute("SELECT key, value FROM meta WHERE key IN ('etag', 'last_modified')"))
+
+    def set_cache_headers(self, cache_headers):
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO meta VALUES (?, ?)', ((k, v) for k, v in (cache_headers or {}).items() if v)
+        )
+        self.connection.commit()
+
+    def exact_matches(self, query):
+        query = query.lower()
+        rows = self.connection.execute(
+            'SELECT id, symbol, name FROM coins WHERE id_lc = ? OR symbol_lc = ? OR name_lc = ? ORDER BY list_pos',
+            (query, query, query)
+        )
+
+        return [{'id': r[0], 'symbol': r[1], 'name': r[2]} for r in rows]
+
+    def partial_matches(self, query):
+        query = query.lower()
+        grams = sorted(_ngrams(query))
+
+        if grams:
+            rows = self.connection.execute(
+                f'SELECT list_pos, id_lc, symbol_lc, name_lc FROM coins WHERE pos IN ('
+                f'  SELECT pos FROM grams WHERE gram IN ({",".join("?" * len(grams))})'
+                f'  GROUP BY pos HAVING COUNT(*) = ?'
+                f')',
+                (*grams, len(grams))
+            )
+
+        else:
+            rows = self.connection.execute(
+                'SELECT list_pos, id_lc, symbol_lc, name_lc FROM coins '
+                'WHERE instr(id_lc, ?) OR instr(symbol_lc, ?) OR instr(name_lc, ?)',
+                (query, query, query)
+            )
+
+        ranked = []
+        for list_pos, *coin_names in rows:
+            if query in coin_names:
+                continue
+
+            matching = [x for x in coin_names if query in x]
+            if matching:
+                is_prefix = any(x.startswith(query) for x in matching)
+                ranked.append((0 if is_prefix else 1, min(len(x) for x in matching), list_pos, coin_names))
+
+        return [r[-1] for r in sorted(ranked)]
+
+
+def get_coin_index(debug=False, update=False):
+    index_is_current = (
+        coins_list_db_file.is_file() and coins_list_json_file.is_file() and
+        coins_list_db_file.stat().st_mtime >= coins_list_json_file.stat().st_mtime
+    )
+
+    if debug:
+        start = time.perf_counter()
+        rss_before = _rss_str()
+
+    if index_is_current and not update:
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} coins cache ("{coins_list_db_file}") found, opening... ',
+                end='', flush=True
+            )
+
+        index = CoinIndex.open(coins_list_db_file)
+
+    elif index_is_current:
+        index = CoinIndex.open(coins_list_db_file)
+        coins_list, cache_headers = get_coins_list(
+            debug=debug, update=update, cache_headers=index.get_cache_headers()
+        )
+
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} updating coins cache ("{coins_list_db_file}")... ', end='', flush=True
+            )
+
+        if coins_list is not None:
+            added, removed = index.apply_changes(coins_list)
+
+            if debug:
+                print(f'{added} added, {removed} removed, ', end='', flush=True)
+
+        index.set_cache_headers(cache_headers)
+        coins_list_db_file.touch()
+
+    else:
+        coins_list, cache_headers = get_coins_list(debug=debug, update=update)
+
+        if debug:
+            print(
+                f' {time.strftime("%H:%M:%S")} writing coins cache ("{coins_list_db_file}")... ', end='', flush=True
+            )
+
+        index = CoinIndex.build(coins_list, coins_list_db_file)
+        index.set_cache_headers(cache_headers)
+
+    if debug:
+        print(f'done ({time.perf_counter() - start:,.3f}s, rss {rss_before} -> {_rss_str()})')
+
+    return index
@@ -0,0 +1,159 @@
+import csv
+import json
+import sys
+import time
+from typing import Dict
+
+from c_dataclasses import PortfolioSnapshot, blank_quantity
+from c_functions import page_rows, write_lines
+
+json_groups = {'comparison': 'comparison', 'holding': 'holdings', 'eth': 'eth', 'validator': 'validators'}
+
+
+def _raw(quantity):
+    return None if quantity is blank_quantity else quantity.raw
+
+
+def _comparisons(prefix, symbols, quantities):
+    return {f'{prefix}_{symbol.lower()}': _raw(q) for symbol, q in zip(symbols, quantities)}
+
+
+def _fieldnames(symbols, extra_fiat=()):
+    fieldnames = [
+        'type', 'name', 'symbol', 'rank', 'quantity', 'staked', 'earned', 'price', 'value', 'market_cap', 'percent'
+    ]
+
+    fieldnames += [f'value_in_{currency.lower()}' for currency in extra_fiat]
+    for prefix in ('price_in', 'value_in', 'market_cap_percent_of'):
+        fieldnames += [f'{prefix}_{symbol.lower()}' for symbol in symbols]
+
+    return fieldnames
+
+
+def _records(snapshot: PortfolioSnapshot, page=None, limit=None):
+    symbols = [c.symbol for c in snapshot.comparison_coins]
+    extra_fiat = snapshot.extra_fiat_currencies
+
+    for comp in snapshot.comparison_coins:
+        yield {
+            'type': 'comparison', 'name': comp.name, 'symbol': comp.symbol, 'rank': comp.rank,
+            'price': comp.value_of_one.raw, 'market_cap': comp.market_cap.raw
+        }
+
+    for coin in snapshot.coins:
+        yield {
+            'type': 'holding', 'name': coin.name, 'symbol': coin.symbol, 'rank': coin.rank,
+            'quantity': coin.total_held.raw, 'price': coin.value_of_one.raw, 'value': coin.value_of_held.raw,
+            'market_cap': coin.market_cap.raw, 'percent': coin.perc_of_total.raw,
+            **_comparisons('value_in', extra_fiat, coin.extra_fiat_values_of_held),
+            **_comparisons('price_in', symbols, coin.comp_list_prices_of_1),
+            **_comparisons('value_in', symbols, coin.comp_list_values_of_held),
+            **_comparisons('market_cap_percent_of', symbols, coin.comp_list_m_cap_percs)
+        }
+
+        for s in (coin.qty_held, coin.qty_staked, coin.qty_earned):
+            if s:
+                yield {
+                    'type': 'eth', 'name': s.short_str.lower(), 'symbol': 'ETH',
+                    'quantity': s.quantity.raw, 'value': s.in_fiat.raw,
+                    **_comparisons('value_in', extra_fiat, s.extra_fiat_values_of_held),
+                    **_comparisons('value_in', symbols, s.comp_list_values_of_held)
+                }
+
+        if coin.validators:
+            yield from _validator_records(
+                coin.validators, symbols, extra_fiat, page_rows(len(coin.validators), page, limit)
+            )
+
+    yield {
+        'type': 'total', 'value': snapshot.total_held_in_fiat.raw,
+        **_comparisons('value_in', extra_fiat, snapshot.extra_fiat_totals),
+        **_comparisons('value_in', symbols, snapshot.comp_list_total_values)
+    }
+
+
+def _validator_records(validators, symbols, extra_fiat, rows):
+    percentages = validators.percentages()
+    valuation = validators.valuation
+    comparisons = validators.comparisons['total']
+
+    for pos in rows:
+        total = validators.total[pos]
+
+        yield {
+            'type': 'validator', 'name': validators.indexes[pos], 'symbol': 'ETH',
+            'quantity': total, 'staked': validators.staked[pos], 'earned': validators.earned[pos],
+            'value': total * validators.fiat_value_of_one, 'percent': percentages[pos],
+            **{
+                f'value_in_{currency.lower()}': None if value_of_one is None else total * value_of_one
+                for currency, value_of_one in zip(extra_fiat, validators.extra_fiat_values_of_one)
+            },
+            **{
+                f'value_in_{symbol.lower()}': None if valuation.is_ethereum[c_idx] else comparisons[c_idx][pos]
+                for c_idx, symbol in enumerate(symbols)
+            }
+        }
+
+
+def _grouped(records, output=None):
+    output = {} if output is None else output
+    for record in records:
+        if record['type'] == 'total':
+            output['total'] = record
+
+        else:
+            output.setdefault(json_groups[record['type']], []).append(record)
+
+    return output
+
+
+def write_output(snapshot: PortfolioSnapshot, output_format, page=None, limit=None):
+    records = _records(snapshot, page=page, limit=limit)
+
+    if output_format == 'ndjson':
+        write_lines(json.dumps(r) for r in records)
+
+    elif output_format == 'csv':
+        fieldnames = _fieldnames([c.symbol for c in snapshot.comparison_coins], snapshot.extra_fiat_currencies)
+        writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(records)
+
+    else:
+        output = {'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'currency': snapshot.fiat_currency}
+        json.dump(_grouped(records, output), sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+def write_batch_output(snapshots: Dict[str, PortfolioSnapshot], output_format, page=None, limit=None):
+    # the same records as write_output, tagged with the holdings file each one came from
+    def records(portfolio, snapshot):
+        return ({'portfolio': portfolio, **r} for r in _records(snapshot, page=page, limit=limit))
+
+    if output_format == 'ndjson':
+        write_lines(json.dumps(r) for portfolio, snapshot in snapshots.items() for r in records(portfolio, snapshot))
+
+    elif output_format == 'csv':
+        # every portfolio is compared to the same coins and currencies, so they share one header
+        first = next(iter(snapshots.values()), None)
+        fieldnames = _fieldnames(
+            [c.symbol for c in first.comparison_coins] if first else [], first.extra_fiat_currencies if first else []
+        )
+        writer = csv.DictWriter(sys.stdout, fieldnames=['portfolio'] + fieldnames, lineterminator='\n')
+        writer.writeheader()
+
+        for portfolio, snapshot in snapshots.items():
+            writer.writerows(records(portfolio, snapshot))
+
+    else:
+        output = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'currency': next(iter(snapshots.values())).fiat_currency if snapshots else None,
+            'portfolios': [
+                _grouped(_records(snapshot, page=page, limit=limit), {'portfolio': portfolio})
+                for portfolio, snapshot in snapshots.items()
+            ]
+        }
+
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
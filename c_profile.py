@@ -0,0 +1,113 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict
+import json
+import threading
+import time
+
+top_allocations = 25
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    seconds: float = 0.0
+    thread: str = ''
+    attrs: Dict = field(default_factory=dict)
+    children: List['Span'] = field(default_factory=list)
+
+
+_root = None
+_tracemalloc = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def start_profile(trace_memory=False):
+    global _root, _tracemalloc
+
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+        _tracemalloc = tracemalloc
+
+    _root = Span(name='run', start=time.perf_counter(), thread=threading.current_thread().name)
+
+
+@contextmanager
+def span(name, **attrs):
+    if _root is None:
+        yield attrs
+        return
+
+    stack = _local.__dict__.setdefault('stack', [])
+    # spans opened in worker threads with nothing open on that thread hang off the run itself
+    parent = stack[-1] if stack else _root
+    current = Span(
+        name=name, start=time.perf_counter() - _root.start, thread=threading.current_thread().name, attrs=attrs
+    )
+
+    with _lock:
+        parent.children.append(current)
+
+    traced_before = _tracemalloc.get_traced_memory()[0] if _tracemalloc else None
+    stack.append(current)
+    start = time.perf_counter()
+
+    try:
+        yield current.attrs
+
+    finally:
+        current.seconds = time.perf_counter() - start
+        stack.pop()
+
+        if traced_before is not None:
+            current.attrs['allocated_kb'] = (_tracemalloc.get_traced_memory()[0] - traced_before) / 1024
+
+
+def in_current_span(func):
+    # for work handed to a thread pool: the spans it opens go under the span that handed it over, not the run
+    stack = _local.__dict__.get('stack')
+    parent = stack[-1] if stack else None
+
+    if parent is None:
+        return func
+
+    def run(*args, **kwargs):
+        worker_stack = _local.__dict__.setdefault('stack', [])
+        worker_stack.append(parent)
+
+        try:
+            return func(*args, **kwargs)
+
+        finally:
+            worker_stack.pop()
+
+    return run
+
+
+def write_profile(profile_file):
+    global _root, _tracemalloc
+
+    _root.seconds = time.perf_counter() - _root.start
+    _root.start = 0.0
+    report = {'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'spans': asdict(_root)}
+
+    if _tracemalloc:
+        current, peak = _tracemalloc.get_traced_memory()
+        stats = _tracemalloc.take_snapshot().statistics('lineno')[:top_allocations]
+        _tracemalloc.stop()
+
+        report['memory'] = {
+            'current_kb': current / 1024, 'peak_kb': peak / 1024,
+            'top_allocations': [
+                {'where': str(stat.traceback[0]), 'kb': stat.size / 1024, 'count': stat.count} for stat in stats
+            ]
+        }
+
+    with open(profile_file, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    _root = None
+    _tracemalloc = None
@@ -0,0 +1,95 @@
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from typing import List
+import io
+import os
+import sys
+import time
+
+from c_api import get_coin_prices, get_beaconchain_data
+from c_constants import watch_validators_interval
+from c_functions import fetch_data, build_snapshot, get_validator_indexes, add_fiat_prices
+
+esc = '\x1b['
+
+
+@dataclass
+class Screen:
+    lines: List[str] = field(default_factory=list)
+
+    def draw(self, text: str):
+        lines = text.split('\n')
+
+        if len(lines) != len(self.lines):
+            sys.stdout.write(f'{esc}H{esc}2J{text}')
+
+        else:
+            for row, (old, new) in enumerate(zip(self.lines, lines), start=1):
+                if old == new:
+                    continue
+
+                # only rewrite the span of the line that differs, which is usually a single cell
+                first = next((i for i, (o, n) in enumerate(zip(old, new)) if o != n), min(len(old), len(new)))
+                if len(old) == len(new):
+                    last = len(new) - next(i for i, (o, n) in enumerate(zip(old[::-1], new[::-1])) if o != n)
+                    sys.stdout.write(f'{esc}{row};{first + 1}H{new[first:last]}')
+
+                else:
+                    sys.stdout.write(f'{esc}{row};{first + 1}H{new[first:]}{esc}K')
+
+            sys.stdout.write(f'{esc}{len(lines)};1H')
+
+        sys.stdout.flush()
+        self.lines = lines
+
+
+def watch(fiat_currency, args, show):
+    if os.name == 'nt':
+        # enables ansi escape sequences in the windows console
+        os.system('')
+
+    # every tick asks for new prices, a cached copy is only used if that fails
+    fiat_currency, coins_json = fetch_data(fiat_currency=fiat_currency, args=args, fresh=True)
+    validator_indexes = get_validator_indexes() if 'ethereum' in coins_json['holdings'] else []
+    validators_fetched = time.monotonic()
+
+    screen = Screen()
+    sys.stdout.write(f'{esc}?25l')
+
+    try:
+        while True:
+            frame = io.StringIO()
+
+            with redirect_stdout(frame):
+                print(f'\n {time.strftime("%A - %Y/%m/%d - %X")} (every {args.watch:g}s, ctrl+c to quit)\n')
+
+                if screen.lines:
+                    # the holdings file isn't re-read while watching, so only the first fetch records them
+                    get_coin_prices(
+                        coins=coins_json, currency=fiat_currency, debug=args.debug, test=args.test, fresh=True,
+                        record_holdings=False, extra_currencies=coins_json['extra_fiat_currencies']
+                    )
+                    add_fiat_prices(
+                        coins_json=coins_json, extra_fiat_currencies=coins_json['extra_fiat_currencies'],
+                        debug=args.debug, test=args.test
+                    )
+
+                    if validator_indexes and time.monotonic() - validators_fetched >= watch_validators_interval:
+                        coins_json['holdings']['ethereum']['validators_data'] = get_beaconchain_data(
+                            validator_indexes=validator_indexes, debug=args.debug, test=args.test
+                        )
+                        validators_fetched = time.monotonic()
+
+                show(
+                    build_snapshot(coins_json=coins_json, fiat_currency=fiat_currency, validator_mode=args.validators)
+                )
+
+            screen.draw(frame.getvalue())
+            time.sleep(args.watch)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        sys.stdout.write(f'{esc}?25h\n')
+        sys.stdout.flush()
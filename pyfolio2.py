@@ -1,15 +1,83 @@
 #!/usr/bin/python3
 
 import argparse
-from c_constants import currency
-from c_functions import prepare_data, display_data, display_validators
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from c_constants import load_config, validators_per_page, config_file
+from c_functions import prepare_data, prepare_batch, display_data, display_validators, display_history
+from c_history import parse_span
+from c_profile import span, start_profile, write_profile
+
+
+def show(snapshot, args):
+    if args.validators:
+        for coin in snapshot.coins:
+            if coin.symbol == 'ETH':
+                try:
+                    validators = coin.validators
+
+                except AttributeError:
+                    print('eek')
+
+                else:
+                    with span('render', table='validators', rows=len(validators)):
+                        display_validators(snapshot=snapshot, validators=validators, page=args.page, limit=args.limit)
+
+                finally:
+                    break
+
+    else:
+        with span('render', table='holdings', rows=len(snapshot.coins)):
+            display_data(snapshot=snapshot, page=args.page, limit=args.limit)
+
+
+def run(fiat_currency, args):
+    if args.history is not None:
+        display_history(fiat_currency=fiat_currency, period=args.history)
+
+    elif args.batch and args.output:
+        from c_output import write_batch_output
+
+        with redirect_stdout(sys.stderr):
+            snapshots = prepare_batch(fiat_currency=fiat_currency, args=args, holdings_paths=args.batch)
+
+        with span('render', output=args.output, portfolios=len(snapshots)):
+            write_batch_output(
+                snapshots={str(path): snapshot for path, snapshot in snapshots.items()}, output_format=args.output,
+                page=args.page, limit=args.limit
+            )
+
+    elif args.batch:
+        for path, snapshot in prepare_batch(fiat_currency=fiat_currency, args=args, holdings_paths=args.batch).items():
+            print(f' {path}')
+            show(snapshot=snapshot, args=args)
+
+    elif args.output:
+        from c_output import write_output
+
+        # keep progress and prompts out of the machine readable output
+        with redirect_stdout(sys.stderr):
+            snapshot = prepare_data(fiat_currency=fiat_currency, args=args)
+
+        with span('render', output=args.output):
+            write_output(snapshot=snapshot, output_format=args.output, page=args.page, limit=args.limit)
+
+    elif args.watch:
+        from c_watch import watch
+        watch(fiat_currency=fiat_currency, args=args, show=lambda snapshot: show(snapshot=snapshot, args=args))
+
+    else:
+        show(snapshot=prepare_data(fiat_currency=fiat_currency, args=args), args=args)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        '-f', '--fiat-currency', action='store', type=str,
-        help='show prices in a particular fiat currency - change the default in config.ini'
+        '-f', '--fiat-currency', action='store', type=str, nargs='+',
+        help='show prices in a particular fiat currency - change the default in config.ini. Give more than one '
+             '(eg: -f usd eur gbp) to add a value column for each of the others'
     )
 
     parser.add_argument(
@@ -23,31 +91,93 @@ if __name__ == '__main__':
     parser.add_argument('-d', '--debug', action='store_true')
     parser.add_argument(
         '-u', '--update-coins-list', action='store_true',
-        help='download a fresh copy of the CoinGecko coins list (necessary if they add a new coin)'
+        help='download a fresh copy of the CoinGecko coins and currencies lists (necessary if they add a new coin)'
     )
     parser.add_argument(
         '-t', '--test', action='store_true',
         help='use locally saved data instead of getting it fresh from the apis (saves api calls while testing)'
     )
+    parser.add_argument(
+        '-w', '--watch', action='store', type=float, metavar='SECONDS',
+        help='keep running and refresh prices every SECONDS, redrawing only the values that changed'
+    )
+    parser.add_argument(
+        '-o', '--output', action='store', choices=('json', 'csv', 'ndjson'),
+        help='print the data as json, csv or ndjson (one record per line) instead of drawing tables'
+    )
+    parser.add_argument(
+        '--history', action='store', type=parse_span, nargs='?', const='1d', metavar='SPAN',
+        help='show how prices, holdings and values changed over SPAN (eg: 12h, 7d - default 1d) from the locally '
+             'recorded history, without calling any apis'
+    )
+    parser.add_argument(
+        '--limit', action='store', type=int, metavar='N',
+        help=f'only list N validators at a time (default all, or {validators_per_page} when --page is used)'
+    )
+    parser.add_argument(
+        '--page', action='store', type=int, metavar='N',
+        help='which page of validators to list when there are more than --limit'
+    )
+    parser.add_argument(
+        '-b', '--batch', action='store', type=Path, nargs='+', metavar='HOLDINGS_FILE',
+        help='value several holdings files in one go, sharing one coins list lookup and one set of price and '
+             'validator requests between them'
+    )
+    parser.add_argument(
+        '--profile', action='store', nargs='?', const='profile.json', metavar='FILE',
+        help='time each stage of the run (config, holdings, http calls, json decoding, building the tables and '
+             'drawing them) and save the nested timings as json to FILE (default profile.json)'
+    )
+    parser.add_argument(
+        '--cprofile', action='store', metavar='FILE',
+        help='also run cProfile and save its stats to FILE (open them with python -m pstats FILE)'
+    )
+    parser.add_argument(
+        '--tracemalloc', action='store_true',
+        help='add memory allocated by each stage, and the lines that allocated the most, to the --profile report'
+    )
 
     args = parser.parse_args()
 
-    coins = prepare_data(fiat_currency=(args.fiat_currency or currency).upper(), args=args)
+    if args.watch is not None and args.watch <= 0:
+        parser.error('--watch needs a number of seconds greater than 0')
 
-    if args.validators:
-        for coin in coins:
-            if coin.symbol == 'ETH':
-                try:
-                    validators = coin.validators
+    for option in ('limit', 'page'):
+        if getattr(args, option) is not None and getattr(args, option) < 1:
+            parser.error(f'--{option} needs to be at least 1')
 
-                except AttributeError:
-                    print('eek')
+    if args.watch and args.output:
+        parser.error('--output can\'t be combined with --watch')
 
-                else:
-                    display_validators(validators=validators)
+    if args.batch and (args.watch or args.history is not None):
+        parser.error('--batch can\'t be combined with --watch or --history')
 
-                finally:
-                    break
+    if args.tracemalloc and not args.profile:
+        parser.error('--tracemalloc needs --profile')
 
-    else:
-        display_data(coins=sorted(coins))
+    if args.profile:
+        start_profile(trace_memory=args.tracemalloc)
+
+    with span('config load', file=config_file.name):
+        config = load_config()
+
+    fiat_currency = (args.fiat_currency[0] if args.fiat_currency else config.currency).upper()
+
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        run(fiat_currency=fiat_currency, args=args)
+
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            print(f' cProfile stats saved ("{args.cprofile}")', file=sys.stderr)
+
+        if args.profile:
+            write_profile(args.profile)
+            print(f' profile saved ("{args.profile}")', file=sys.stderr)
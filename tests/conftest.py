@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# the c_* modules sit at the top of the repo rather than in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import c_constants  # noqa: E402
+
+
+@pytest.fixture
+def config(monkeypatch):
+    # the default config, without reading or writing config.ini
+    monkeypatch.setattr(c_constants, '_config', c_constants.Config())
+    return c_constants._config
@@ -0,0 +1,24 @@
+from c_functions import add_fiat_prices
+
+
+def coins_json():
+    return {
+        'holdings': {'chainlink': {'symbol': 'LINK'}},
+        'comparison': {'bitcoin': {'symbol': 'BTC'}},
+        'fiat_prices': {'chainlink': {'EUR': 20.0, 'BTC': 0.0004}, 'bitcoin': {'EUR': 45000.0, 'BTC': 1.0}},
+    }
+
+
+def test_prices_from_the_main_request_are_used_without_another_fetch():
+    coins = add_fiat_prices(coins_json(), ['EUR'])
+
+    assert 'fiat_prices' not in coins
+    assert coins['holdings']['chainlink']['fiat_prices']['EUR'] == 20.0
+    assert coins['comparison']['bitcoin']['fiat_prices']['EUR'] == 45000.0
+
+
+def test_currencies_that_clash_with_a_comparison_coin_are_skipped(capsys):
+    coins = add_fiat_prices(coins_json(), ['BTC', 'EUR'])
+
+    assert coins['extra_fiat_currencies'] == ['EUR']
+    assert '"BTC" is already a comparison coin' in capsys.readouterr().out
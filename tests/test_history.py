@@ -0,0 +1,60 @@
+import pytest
+
+from c_history import History, parse_span
+
+
+@pytest.mark.parametrize('text, seconds', [
+    ('90', 90), ('30s', 30), ('15m', 900), ('12h', 43200), (' 1D ', 86400), ('2w', 1209600), ('1.5h', 5400)
+])
+def test_parse_span(text, seconds):
+    assert parse_span(text) == seconds
+
+
+def test_parse_span_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_span('soon')
+
+
+def price(coin_id, symbol, price_):
+    return {'id': coin_id, 'symbol': symbol, 'market_cap_rank': 1, 'current_price': price_, 'market_cap': 0}
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = History.open(tmp_path / 'history.db')
+
+    history.add_prices([price('bitcoin', 'btc', 100.0), price('ethereum', 'eth', 10.0)], 'USD', 1000)
+    history.add_prices([price('bitcoin', 'btc', 90.0)], 'EUR', 1000)
+    history.add_prices([price('bitcoin', 'btc', 110.0)], 'USD', 2000)
+    history.add_prices([price('ethereum', 'eth', 12.0)], 'USD', 3000)
+
+    history.add_holdings({'bitcoin': {'held': 1.0}, 'ethereum': {'held': 0, 'comparison_only': True}}, 1000)
+    history.add_holdings({'bitcoin': {'held': 2.0}}, 2500)
+
+    history.add_validators([{'validatorindex': 7, 'balance': 32000000000}], 1000)
+    history.add_validators([{'validatorindex': 7, 'balance': 32100000000}], 2000)
+
+    return history
+
+
+def test_prices_at_takes_the_latest_row_at_or_before_the_time(history):
+    assert history.prices_at('usd', 999) == {}
+    assert history.prices_at('usd', 1000) == {'bitcoin': ('BTC', 1, 100.0, 1000), 'ethereum': ('ETH', 1, 10.0, 1000)}
+    assert history.prices_at('usd', 2999) == {'bitcoin': ('BTC', 1, 110.0, 2000), 'ethereum': ('ETH', 1, 10.0, 1000)}
+    assert history.prices_at('usd', 5000) == {'bitcoin': ('BTC', 1, 110.0, 2000), 'ethereum': ('ETH', 1, 12.0, 3000)}
+
+
+def test_prices_at_keeps_currencies_apart(history):
+    assert history.prices_at('EUR', 5000) == {'bitcoin': ('BTC', 1, 90.0, 1000)}
+
+
+def test_holdings_and_validators_at(history):
+    assert history.holdings_at(1500) == {'bitcoin': 1.0}
+    assert history.holdings_at(2500) == {'bitcoin': 2.0}
+    assert history.validators_at(1999) == {'7': 32000000000}
+    assert history.validators_at(2000) == {'7': 32100000000}
+
+
+def test_first_timestamp(history):
+    assert history.first_timestamp('usd') == 1000
+    assert history.first_timestamp('gbp') is None
@@ -0,0 +1,98 @@
+import sqlite3
+
+from c_index import CoinIndex
+
+
+def coin(coin_id, symbol, name):
+    return {'id': coin_id, 'symbol': symbol, 'name': name}
+
+
+coins_list = [
+    coin('bitcoin', 'btc', 'Bitcoin'),
+    coin('bitcoin-cash', 'bch', 'Bitcoin Cash'),
+    coin('wrapped-bitcoin', 'wbtc', 'Wrapped Bitcoin'),
+    coin('ethereum', 'eth', 'Ethereum'),
+    coin('ethereum-classic', 'etc', 'Ethereum Classic'),
+    coin('bitcoin-gold', 'btg', 'Bitcoin Gold'),
+    coin('eth-2', 'eth', 'Eth 2'),
+]
+
+
+def ids(matches):
+    return [m[0] for m in matches]
+
+
+def test_exact_matches_follow_coins_list_order(tmp_path):
+    index = CoinIndex.build(coins_list, tmp_path / 'coins.db')
+
+    assert [c['id'] for c in index.exact_matches('ETH')] == ['ethereum', 'eth-2']
+    assert index.exact_matches('Bitcoin Cash') == [coin('bitcoin-cash', 'bch', 'Bitcoin Cash')]
+    assert index.exact_matches('nothing') == []
+
+
+def test_partial_matches_rank_prefixes_then_shortest_then_list_order(tmp_path):
+    index = CoinIndex.build(coins_list, tmp_path / 'coins.db')
+
+    assert ids(index.partial_matches('bitcoin')) == ['bitcoin-cash', 'bitcoin-gold', 'wrapped-bitcoin']
+    assert ids(index.partial_matches('ethereum')) == ['ethereum-classic']
+
+
+def test_partial_matches_short_queries(tmp_path):
+    # queries shorter than an ngram can't use the grams table
+    index = CoinIndex.build(coins_list, tmp_path / 'coins.db')
+
+    assert ids(index.partial_matches('bc')) == ['bitcoin-cash']
+    assert ids(index.partial_matches('zz')) == []
+
+
+def test_apply_changes_orders_like_a_fresh_build(tmp_path):
+    new_list = [
+        coin('aave', 'aave', 'Aave'),
+        coin('bitcoin', 'btc', 'Bitcoin'),
+        coin('bitcoin-cash', 'bch', 'Bitcoin Cash ABC'),
+        coin('bitcoin-silver', 'bts', 'Bitcoin Silver'),
+        coin('wrapped-bitcoin', 'wbtc', 'Wrapped Bitcoin'),
+        coin('ethereum', 'eth', 'Ethereum'),
+        coin('bitcoin-gold', 'btg', 'Bitcoin Gold'),
+        coin('eth-2', 'eth', 'Eth 2'),
+    ]
+
+    updated = CoinIndex.build(coins_list, tmp_path / 'updated.db')
+    assert updated.apply_changes(new_list) == (3, 2)
+
+    fresh = CoinIndex.build(new_list, tmp_path / 'fresh.db')
+
+    for query in ('bitcoin', 'eth', 'bitcoin cash abc', 'aave', 'ethereum classic', 'b'):
+        assert updated.exact_matches(query) == fresh.exact_matches(query)
+        assert updated.partial_matches(query) == fresh.partial_matches(query)
+
+
+def test_apply_changes_without_changes(tmp_path):
+    index = CoinIndex.build(coins_list, tmp_path / 'coins.db')
+
+    assert index.apply_changes(coins_list) == (0, 0)
+    assert ids(index.partial_matches('bitcoin')) == ['bitcoin-cash', 'bitcoin-gold', 'wrapped-bitcoin']
+
+
+def test_open_adds_list_pos_to_older_caches(tmp_path):
+    db_file = tmp_path / 'coins.db'
+    db = sqlite3.connect(str(db_file))
+    db.executescript(
+        'CREATE TABLE coins ('
+        '  pos INTEGER PRIMARY KEY, id TEXT, symbol TEXT, name TEXT, id_lc TEXT, symbol_lc TEXT, name_lc TEXT'
+        ');'
+        'CREATE TABLE grams (gram TEXT, pos INTEGER, PRIMARY KEY (gram, pos)) WITHOUT ROWID;'
+    )
+    db.executemany(
+        'INSERT INTO coins VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (
+            (pos, c['id'], c['symbol'], c['name'], c['id'].lower(), c['symbol'].lower(), c['name'].lower())
+            for pos, c in enumerate(coins_list)
+        )
+    )
+    db.commit()
+    db.close()
+
+    index = CoinIndex.open(db_file)
+
+    assert [c['id'] for c in index.exact_matches('eth')] == ['ethereum', 'eth-2']
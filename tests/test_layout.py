@@ -0,0 +1,59 @@
+from c_constants import validators_per_page
+from c_dataclasses import TableCol, TableLayout, TableSection
+from c_functions import page_rows
+
+
+def layout():
+    return TableLayout(sections=[
+        TableSection('name', [TableCol(align='<', header_align='^')]),
+        TableSection('value', [TableCol(), TableCol()], thick=False),
+    ])
+
+
+def test_fit_widens_columns_to_the_longest_cell():
+    table = layout()
+    table.fit([['x', '1', '22'], ['xyz', '333', '4']])
+    table.fit([['55555']], start='value')
+
+    assert [[c.width for c in s.cols] for s in table.sections] == [[3], [5, 2]]
+
+
+def test_template_rule_and_offset():
+    table = layout()
+    table.fit([['abc', '1.0', '20']])
+
+    assert table.template().format('ab', '1.0', '2') == '║ ab  │ 1.0   2 ║'
+    assert table.template(header=True).format('ab', 'v', 'w') == '║ ab  │   v   w ║'
+    assert table.template(start='value').format('1.0', '2') == '│ 1.0   2 ║'
+
+    e = table.e
+    assert table.rule(e.top, e.hor_thick) == '╔' + '═' * 5 + '╤' + '═' * 9 + '╗'
+    assert table.rule(e.bot, e.hor_thin, start='value') == '╚' + '─' * 9 + '╝'
+    assert table.offset('value') == 6
+
+
+def test_blank_merges_every_section():
+    table = layout()
+    table.fit([['abc', '1.0', '20']])
+
+    assert table.blank() == '║' + ' ' * 5 + '│' + ' ' * 9 + '║'
+
+
+def test_page_rows_without_a_limit_shows_everything():
+    assert page_rows(5) == range(5)
+    assert page_rows(0) == range(0)
+
+
+def test_page_rows_pages_and_clamps():
+    assert page_rows(25, limit=10) == range(0, 10)
+    assert page_rows(25, page=2, limit=10) == range(10, 20)
+    assert page_rows(25, page=3, limit=10) == range(20, 25)
+    assert page_rows(25, page=9, limit=10) == range(20, 25)
+    assert page_rows(25, page=0, limit=10) == range(0, 10)
+    assert page_rows(0, page=2, limit=10) == range(0, 0)
+
+
+def test_page_rows_page_without_limit_uses_the_default_page_size():
+    count = validators_per_page * 2 + 1
+
+    assert page_rows(count, page=2) == range(validators_per_page, validators_per_page * 2)
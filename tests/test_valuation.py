@@ -0,0 +1,64 @@
+import pytest
+
+from c_dataclasses import Coin, CoinBase, PortfolioSnapshot, Quantity, Valuation, blank_quantity
+
+
+def coin_data(rank, name, symbol, price, market_cap, held=0.0):
+    return {'rank': rank, 'name': name, 'symbol': symbol, 'price': price, 'market_cap': market_cap, 'held': held}
+
+
+@pytest.fixture
+def snapshot(config):
+    snapshot = PortfolioSnapshot(fiat_currency='USD')
+    snapshot.comparison_coins = [
+        CoinBase(coin_data=coin_data(1, 'Bitcoin', 'BTC', 50000.0, 1000e9), snapshot=snapshot),
+        CoinBase(coin_data=coin_data(2, 'Ethereum', 'ETH', 2500.0, 300e9), snapshot=snapshot),
+    ]
+
+    return snapshot
+
+
+def test_in_comparison_and_m_cap_percentages(snapshot):
+    valuation = Valuation(snapshot=snapshot)
+
+    assert [list(c) for c in valuation.in_comparison([100000.0, 5000.0])] == [[2.0, 0.1], [40.0, 2.0]]
+    assert [list(c) for c in valuation.m_cap_percentages([300e9])] == [[30.0], [100.0]]
+
+
+def test_row_blanks_and_currencies(snapshot):
+    valuation = Valuation(snapshot=snapshot)
+    row = valuation.row(valuation.in_comparison([5000.0]), 0, blanks=[False, True])
+
+    assert row[0] == Quantity(raw=0.1, currency='BTC', dec_places=5)
+    assert row[1] is blank_quantity
+
+
+def test_apply_values_each_coin_against_the_others(snapshot):
+    coins = [
+        Coin(coin_data=coin_data(1, 'Bitcoin', 'BTC', 50000.0, 1000e9, held=0.5), snapshot=snapshot),
+        Coin(coin_data=coin_data(20, 'Chainlink', 'LINK', 25.0, 10e9, held=100.0), snapshot=snapshot),
+    ]
+    snapshot.total_held_in_fiat = Quantity(raw=sum(c.value_of_held.raw for c in coins), currency='USD')
+
+    Valuation(snapshot=snapshot).apply(coins)
+    btc, link = coins
+
+    # a coin isn't compared with itself
+    assert btc.comp_list_values_of_held[0] is blank_quantity
+    assert btc.comp_list_values_of_held[1].raw == pytest.approx(10.0)
+
+    assert [q.raw for q in link.comp_list_prices_of_1] == pytest.approx([0.0005, 0.01])
+    assert [q.raw for q in link.comp_list_values_of_held] == pytest.approx([0.05, 1.0])
+    assert [q.raw for q in link.comp_list_m_cap_percs] == pytest.approx([1.0, 10e9 / 300e9 * 100])
+
+    assert [q.raw for q in snapshot.comp_list_total_values] == pytest.approx([0.55, 11.0])
+
+
+def test_apply_blanks_ethereum_subtypes_in_ether(snapshot):
+    eth = Coin(coin_data=dict(coin_data(2, 'Ethereum', 'ETH', 2500.0, 300e9), held=2.0), snapshot=snapshot)
+    snapshot.total_held_in_fiat = eth.value_of_held
+
+    Valuation(snapshot=snapshot).apply([eth])
+
+    assert eth.qty_held.comp_list_values_of_held[0].raw == pytest.approx(0.1)
+    assert eth.qty_held.comp_list_values_of_held[1] is blank_quantity
@@ -0,0 +1,53 @@
+from c_watch import Screen, esc
+
+
+def draw(screen, text, capsys):
+    capsys.readouterr()
+    screen.draw(text)
+    return capsys.readouterr().out
+
+
+def test_first_frame_clears_the_screen(capsys):
+    screen = Screen()
+
+    assert draw(screen, 'a\nb', capsys) == f'{esc}H{esc}2Ja\nb'
+    assert screen.lines == ['a', 'b']
+
+
+def test_unchanged_frame_only_parks_the_cursor(capsys):
+    screen = Screen(lines=['one', 'two'])
+
+    assert draw(screen, 'one\ntwo', capsys) == f'{esc}2;1H'
+
+
+def test_same_length_change_rewrites_only_the_differing_span(capsys):
+    screen = Screen(lines=['title', '| 1.00 USD | 2.00 USD |'])
+
+    out = draw(screen, 'title\n| 1.00 USD | 2.50 USD |', capsys)
+
+    assert out == f'{esc}2;16H5{esc}2;1H'
+
+
+def test_span_covers_first_to_last_difference(capsys):
+    screen = Screen(lines=['abcdef'])
+
+    assert draw(screen, 'aXcdYf', capsys) == f'{esc}1;2HXcdY{esc}1;1H'
+
+
+def test_length_change_rewrites_the_rest_of_the_line(capsys):
+    screen = Screen(lines=['x', 'total 9.00', 'y'])
+
+    out = draw(screen, 'x\ntotal 10.00\ny', capsys)
+
+    assert out == f'{esc}2;7H10.00{esc}K{esc}3;1H'
+
+    out = draw(screen, 'x\ntotal 10\ny', capsys)
+
+    assert out == f'{esc}2;9H{esc}K{esc}3;1H'
+
+
+def test_line_count_change_redraws_everything(capsys):
+    screen = Screen(lines=['a', 'b'])
+
+    assert draw(screen, 'a\nb\nc', capsys) == f'{esc}H{esc}2Ja\nb\nc'
+    assert screen.lines == ['a', 'b', 'c']